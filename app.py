@@ -4,7 +4,7 @@ from PIL import Image, ImageOps
 import matplotlib.pyplot as plt
 import os
 import time
-from cosmos_net import load_or_create_brain, save_brain, get_star_map_figure, CosmosResonator
+from cosmos_net import load_or_create_brain, get_star_map_figure, CosmosResonator, BrainJournal, BackgroundSaver
 
 # --- Lazy Load Retina ---
 # We put this in a function or try-except block so the app doesn't crash 
@@ -12,8 +12,8 @@ from cosmos_net import load_or_create_brain, save_brain, get_star_map_figure, Co
 @st.cache_resource
 def get_retina():
     try:
-        from retina import Retina
-        return Retina()
+        from retina import Retina, DEFAULT_CACHE_DIR, DEFAULT_ARTIFACT
+        return Retina(cache_dir=DEFAULT_CACHE_DIR, artifact=DEFAULT_ARTIFACT)
     except ImportError:
         return None
 
@@ -144,16 +144,41 @@ if 'brain' not in st.session_state:
 if 'last_uploaded_file' not in st.session_state:
     st.session_state.last_uploaded_file = None
 
+def brain_saver():
+    # v11.0: Full snapshots are written on a background thread; buttons return immediately.
+    saver = st.session_state.get('saver')
+    if saver is None or saver.filename != st.session_state.current_brain_file:
+        if saver is not None:
+            saver.close() # Flush the previous brain file
+        saver = BackgroundSaver(st.session_state.current_brain_file)
+        st.session_state.saver = saver
+    return saver
+
+def brain_journal():
+    # v11.0: Interactions are appended to <brain>.journal instead of re-pickling the whole brain.
+    journal = st.session_state.get('journal')
+    if journal is None or journal.filename != st.session_state.current_brain_file:
+        journal = BrainJournal(st.session_state.current_brain_file, saver=brain_saver())
+        st.session_state.journal = journal
+    return journal
+
+def flush_brain():
+    # Pending background writes must land before a brain file is (re)loaded.
+    if st.session_state.get('saver') is not None:
+        st.session_state.saver.flush()
+
 def reset_brain():
-    st.session_state.brain = CosmosResonator()
-    if os.path.exists(st.session_state.current_brain_file):
-        os.remove(st.session_state.current_brain_file)
+    st.session_state.brain = brain_journal().reset(st.session_state.brain)
     st.session_state.log_msg = t('reset_msg')
 
 # --- Initialize Retina ---
 retina = get_retina()
 if retina:
     st.sidebar.success(t('retina_active'))
+    if retina.cache is not None:
+        cache = retina.cache.report()
+        st.sidebar.caption(f"Embedding cache: {cache['entries']} images, {cache['bytes'] / 2**20:.1f} MB, "
+                           f"hit rate {cache['hit_rate']:.0%}")
 else:
     st.sidebar.warning(t('retina_fail'))
 
@@ -168,7 +193,7 @@ with st.sidebar:
     st.write(t('version'))
     
     st.markdown(t('brain_core'))
-    brain_files = [f for f in os.listdir('.') if f.endswith('.pkl')]
+    brain_files = [f for f in os.listdir('.') if f.endswith(('.pkl', '.cosmos'))]
     if "cosmos_brain.pkl" not in brain_files:
         brain_files.append("cosmos_brain.pkl")
     
@@ -180,7 +205,8 @@ with st.sidebar:
     
     new_brain_name = st.text_input(t('new_brain'), placeholder="e.g. new_brain.pkl")
     if st.button(t('load_create')):
-        target_file = new_brain_name if new_brain_name.endswith('.pkl') else f"{new_brain_name}.pkl" if new_brain_name else selected_file
+        target_file = new_brain_name if new_brain_name.endswith(('.pkl', '.cosmos')) else f"{new_brain_name}.pkl" if new_brain_name else selected_file
+        flush_brain()
         brain, msg = load_or_create_brain(target_file)
         st.session_state.brain = brain
         st.session_state.log_msg = msg
@@ -232,10 +258,11 @@ with st.sidebar:
                         status_text.text(t('downloading_train'))
                         dataset = load_mnist(limit=sample_size, train=True)
                         
-                        msg = evolve_in_dreams(st.session_state.brain, retina, dataset, update_progress)
+                        with brain_saver().lock:
+                            msg = evolve_in_dreams(st.session_state.brain, retina, dataset, update_progress)
                         
                         st.success(msg)
-                        save_brain(st.session_state.brain, st.session_state.current_brain_file)
+                        brain_journal().compact(st.session_state.brain)
                         st.session_state.log_msg = msg
                         time.sleep(1)
                         st.rerun()
@@ -262,7 +289,8 @@ with st.sidebar:
                         status_text.text(t('downloading_test'))
                         dataset = load_mnist(limit=sample_size, train=False)
                         
-                        accuracy, msg = evaluate_brain(st.session_state.brain, retina, dataset, update_progress, self_reinforce=self_reinforce)
+                        with brain_saver().lock:
+                            accuracy, msg = evaluate_brain(st.session_state.brain, retina, dataset, update_progress, self_reinforce=self_reinforce)
                         
                         if accuracy > 80:
                             st.balloons()
@@ -273,7 +301,7 @@ with st.sidebar:
                         st.session_state.log_msg = msg
                         
                         if self_reinforce:
-                            save_brain(st.session_state.brain, st.session_state.current_brain_file)
+                            brain_journal().compact(st.session_state.brain)
                             st.info("Brain has been updated with self-reinforced memories.")
                             time.sleep(1.5)
                             st.rerun()
@@ -288,8 +316,7 @@ with st.sidebar:
     if st.button(t('sleep_btn')):
         with st.spinner(t('dream_spinner')):
             time.sleep(1) # Dramatic pause
-            msg = st.session_state.brain.dream()
-            save_brain(st.session_state.brain, st.session_state.current_brain_file)
+            msg = brain_journal().dream(st.session_state.brain)
             st.session_state.log_msg = msg
             st.success(msg)
             time.sleep(1)
@@ -373,8 +400,7 @@ with col1:
                 # Check integer or string label - we now allow strings conceptually but let's stick to simple logic
                 valid_label = target_label # Allow strings now? CosmosNet supports any label type technically.
                 
-                action = st.session_state.brain.memorize(input_vec, valid_label)
-                save_brain(st.session_state.brain, st.session_state.current_brain_file)
+                action = brain_journal().memorize(st.session_state.brain, input_vec, valid_label)
                 st.session_state.log_msg = t('evolve_msg').format(action)
                 st.rerun()
 
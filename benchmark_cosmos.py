@@ -0,0 +1,187 @@
+"""
+Cosmos-Net performance benchmark on synthetic galaxies.
+
+For every (stars, dim, flat/hierarchy) case: latency and throughput of CorpusCallosum.perceive /
+perceive_batch (exact and with the IVF index), memorize / memorize_batch, save_brain and
+load_or_create_brain (.pkl and .cosmos), get_star_map_figure and dream. Results are written as
+JSON (one flat record per case and operation) so two versions can be diffed with --compare.
+
+Usage: python benchmark_cosmos.py [--stars 1000 10000 100000 1000000] [--dims 784 1280]
+       [--shapes flat hierarchy] [--queries 200] [--output benchmark_cosmos.json] [--compare old.json]
+Note: 1M x 1280-dim stars take ~5 GB of float32 vectors.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import numpy as np
+
+from cosmos_net import CorpusCallosum, StarPool, save_brain, load_or_create_brain, get_star_map_figure
+
+N_LABELS = 10
+NOISE = 0.6 # Distance of a star from its label centre (cosine to the centre ~0.86)
+
+def _unit(X):
+    norms = np.linalg.norm(X, axis=1, keepdims=True)
+    return X / np.where(norms > 0, norms, 1)
+
+def _samples(rng, centers, n, chunk=65536):
+    """n float32 unit vectors scattered around random label centres, plus their (str) labels."""
+    label_ids = rng.integers(0, len(centers), n)
+    vectors = np.empty((n, centers.shape[1]), dtype=np.float32)
+    scale = NOISE / np.sqrt(centers.shape[1])
+    for lo in range(0, n, chunk): # Bounded float32 temporaries at 1M stars
+        hi = min(lo + chunk, n)
+        noise = rng.standard_normal((hi - lo, centers.shape[1]), dtype=np.float32) * scale
+        vectors[lo:hi] = _unit(centers[label_ids[lo:hi]] + noise)
+    names = np.array([str(i) for i in range(len(centers))], dtype=object)
+    return vectors, names[label_ids]
+
+def _pool(rng, vectors, labels):
+    n = len(vectors)
+    return StarPool.from_columns(vectors, labels, rng.integers(1, 20, n).astype(np.int64),
+                                 time.time() - rng.random(n) * 86400)
+
+def synthetic_brain(n_stars, dim, hierarchy=False, seed=0):
+    """
+    A CorpusCallosum holding n_stars clustered stars (built column-wise, not memorized).
+    hierarchy=True puts half of them in children pools under 10% of the root stars, as
+    mitosis does. The Left Brain learns from a few samples per label.
+    """
+    rng = np.random.default_rng(seed)
+    centers = _unit(rng.standard_normal((N_LABELS, dim))).astype(np.float32)
+    n_root = n_stars // 2 if hierarchy else n_stars
+    galaxy = _pool(rng, *_samples(rng, centers, n_root))
+
+    if hierarchy and n_root:
+        categories = np.arange(max(1, n_root // 10))
+        sizes = np.full(len(categories), (n_stars - n_root) // len(categories))
+        sizes[:(n_stars - n_root) % len(categories)] += 1
+        for i, size in zip(categories, sizes):
+            vectors, _ = _samples(rng, galaxy.vectors[i:i + 1], int(size)) # Around the category star
+            galaxy._children[i] = _pool(rng, vectors, np.full(len(vectors), galaxy.labels[i], dtype=object))
+
+    brain = CorpusCallosum()
+    brain.right_hemisphere.galaxy = galaxy
+    warmup, warmup_labels = _samples(rng, centers, 50 * N_LABELS)
+    for x, label in zip(warmup, warmup_labels):
+        brain.left_hemisphere.memorize(x, label)
+    return brain, centers, rng
+
+def _record(case, op, seconds, ops=1, **extra):
+    """One result row: total seconds and ops/s; per-call percentiles when given a list of seconds."""
+    seconds = np.atleast_1d(np.asarray(seconds, dtype=np.float64))
+    total = float(seconds.sum())
+    row = dict(case, op=op, calls=len(seconds), ops=ops, seconds=total,
+               ops_per_s=ops / total if total else None)
+    if len(seconds) > 1:
+        row.update(p50_ms=float(np.percentile(seconds, 50) * 1000), p99_ms=float(np.percentile(seconds, 99) * 1000))
+    row.update(extra)
+    return row
+
+def _timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+def benchmark_case(n_stars, dim, hierarchy=False, queries=200, figure_max=2000, seed=0):
+    case = {'stars': n_stars, 'dim': dim, 'shape': 'hierarchy' if hierarchy else 'flat'}
+    results = []
+    seconds, (brain, centers, rng) = _timed(synthetic_brain, n_stars, dim, hierarchy, seed)
+    results.append(_record(case, 'build', seconds, n_stars))
+    X, y = _samples(rng, centers, queries)
+
+    # Perception (read-only)
+    results.append(_record(case, 'perceive', [_timed(brain.perceive, x)[0] for x in X], queries))
+    results.append(_record(case, 'perceive_batch', _timed(brain.perceive_batch, X)[0], queries))
+    right = brain.right_hemisphere
+    if n_stars >= right.index_min_stars:
+        seconds, _ = _timed(right.build_index)
+        results.append(_record(case, 'build_index', seconds, n_stars))
+        results.append(_record(case, 'perceive_batch_indexed', _timed(brain.perceive_batch, X)[0], queries))
+        right.drop_index()
+
+    # Persistence
+    with tempfile.TemporaryDirectory() as directory:
+        for extension in ('.pkl', '.cosmos'):
+            path = os.path.join(directory, "brain" + extension)
+            seconds, _ = _timed(save_brain, brain, path)
+            results.append(_record(case, 'save' + extension, seconds, n_stars, bytes=os.path.getsize(path)))
+            seconds, (loaded, _) = _timed(load_or_create_brain, path)
+            first, _ = _timed(loaded.perceive, X[0]) # A mapped brain pays for its pages here
+            results.append(_record(case, 'load' + extension, seconds, n_stars, first_perceive_ms=first * 1000))
+            del loaded
+
+    # Visualization (t-SNE grows quadratically; skipped for big galaxies)
+    if n_stars <= figure_max:
+        results.append(_record(case, 'star_map_figure', _timed(get_star_map_figure, brain)[0], n_stars))
+    else:
+        results.append(dict(case, op='star_map_figure', skipped=f"more than {figure_max} stars"))
+
+    # Learning (mutates the brain; run last)
+    half = queries // 2
+    results.append(_record(case, 'memorize', [_timed(brain.memorize, x, label)[0]
+                                              for x, label in zip(X[:half], y[:half])], half))
+    results.append(_record(case, 'memorize_batch', _timed(brain.memorize_batch, X[half:], y[half:])[0],
+                           queries - half))
+    stars_before = len(brain.get_all_stars())
+    seconds, _ = _timed(brain.dream)
+    results.append(_record(case, 'dream', seconds, stars_before, stars_after=len(brain.get_all_stars())))
+    return results
+
+def _meta():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {'commit': commit, 'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'python': platform.python_version(),
+            'numpy': np.__version__, 'machine': platform.machine(), 'cpus': os.cpu_count()}
+
+def compare(old, new):
+    """Print new/old ops_per_s per (case, op); > 1 is faster."""
+    key = lambda row: (row['stars'], row['dim'], row['shape'], row['op'])
+    before = {key(row): row for row in old['results'] if row.get('ops_per_s')}
+    print(f"\n{'stars':>8} {'dim':>5} {'shape':<9} {'op':<24} {'old/s':>11} {'new/s':>11} {'speedup':>8}")
+    for row in new['results']:
+        if row.get('ops_per_s') and key(row) in before:
+            old_rate = before[key(row)]['ops_per_s']
+            print(f"{row['stars']:>8} {row['dim']:>5} {row['shape']:<9} {row['op']:<24} {old_rate:>11.1f} "
+                  f"{row['ops_per_s']:>11.1f} {row['ops_per_s'] / old_rate:>7.2f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument('--stars', nargs='+', type=int, default=[1000, 10000, 100000, 1000000])
+    parser.add_argument('--dims', nargs='+', type=int, default=[784, 1280])
+    parser.add_argument('--shapes', nargs='+', default=['flat', 'hierarchy'], choices=['flat', 'hierarchy'])
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--figure-max', type=int, default=2000, help="largest galaxy to draw a star map for")
+    parser.add_argument('--output', default="benchmark_cosmos.json")
+    parser.add_argument('--compare', help="earlier --output file to compare against")
+    args = parser.parse_args()
+
+    report = {'meta': _meta(), 'results': []}
+    for n_stars in args.stars:
+        for dim in args.dims:
+            for shape in args.shapes:
+                print(f"🔭 {n_stars} stars, {dim}-dim, {shape}...")
+                report['results'] += benchmark_case(n_stars, dim, shape == 'hierarchy', args.queries,
+                                                    args.figure_max)
+                with open(args.output, 'w') as f: # Keep partial results of long runs
+                    json.dump(report, f, indent=1)
+
+    print(f"\n{'stars':>8} {'dim':>5} {'shape':<9} {'op':<24} {'seconds':>9} {'ops/s':>11} {'p50 ms':>8} {'p99 ms':>8}")
+    for row in report['results']:
+        if 'skipped' in row:
+            continue
+        p50, p99 = row.get('p50_ms'), row.get('p99_ms')
+        print(f"{row['stars']:>8} {row['dim']:>5} {row['shape']:<9} {row['op']:<24} {row['seconds']:>9.3f} "
+              f"{row['ops_per_s'] or 0:>11.1f} {p50 if p50 is not None else float('nan'):>8.3f} "
+              f"{p99 if p99 is not None else float('nan'):>8.3f}")
+    print(f"\n✅ Results written to {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
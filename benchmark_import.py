@@ -0,0 +1,49 @@
+"""
+Cold-start benchmark: import time of the headless modules, each in a fresh interpreter.
+
+Reports the best-of-N wall time of `import <module>` and fails (exit code 1) if a headless
+module drags in a visualization or deep-learning stack, or exceeds --budget seconds.
+
+Usage: python benchmark_import.py [--modules cosmos_net training] [--repeats 5] [--budget 0.5]
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+# Packages that only the visualization layer (star_map.py, app.py) or the Retina may load
+HEAVY = ('matplotlib', 'sklearn', 'scipy', 'plotly', 'networkx', 'PIL', 'torch', 'torchvision', 'streamlit')
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+print(json.dumps({{'seconds': seconds, 'modules': sorted({{m.split('.')[0] for m in sys.modules}})}}))
+"""
+
+def import_time(module, repeats=5):
+    """Best-of-`repeats` seconds to import `module` cold, and the top-level packages it loaded."""
+    best, loaded = float('inf'), []
+    for _ in range(repeats):
+        result = subprocess.run([sys.executable, '-c', PROBE.format(module=module)],
+                                capture_output=True, text=True, check=True)
+        probe = json.loads(result.stdout.strip().splitlines()[-1])
+        best = min(best, probe['seconds'])
+        loaded = probe['modules']
+    return best, [m for m in loaded if m in HEAVY]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument('--modules', nargs='+', default=['cosmos_net', 'training'])
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--budget', type=float, default=0.5, help="max seconds per import")
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'module':<16} {'seconds':>8}  heavy imports")
+    for module in args.modules:
+        seconds, heavy = import_time(module, args.repeats)
+        print(f"{module:<16} {seconds:>8.3f}  {', '.join(heavy) or '-'}")
+        failed |= bool(heavy) or seconds > args.budget
+    sys.exit(1 if failed else 0)
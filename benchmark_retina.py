@@ -0,0 +1,96 @@
+"""
+Retina backend / input-resolution benchmark.
+
+For each (backend, resolution): throughput of Retina.perceive_batch, median latency of one
+Retina.perceive call (the interactive upload path), agreement of its embeddings with the
+first (reference) configuration, and the exam accuracy of a brain trained and examined on
+that configuration's vectors (plus the delta to the reference).
+
+Usage: python benchmark_retina.py [--samples 500] [--backends fp32 int8] [--resolutions 0 96 64] [--workers 0 2]
+(resolution 0 = the default 224-pixel ImageNet preset; workers = preprocessing processes, 0 = in-line)
+"""
+import argparse
+import time
+import numpy as np
+
+from cosmos_net import CorpusCallosum
+from retina import Retina, BACKENDS
+from training import load_mnist, evolve_in_dreams, evaluate_brain
+
+def throughput(retina, images, batch_size=64, repeats=3):
+    """Best-of-`repeats` images per second of one perceive_batch pass."""
+    out = np.empty((len(images), retina.dim), dtype=np.float32)
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        retina.perceive_batch(images, batch_size=batch_size, out=out)
+        best = min(best, time.perf_counter() - start)
+    return len(images) / best
+
+def latency(retina, images, calls=50):
+    """Median milliseconds of one Retina.perceive(image) call (after one warm-up call)."""
+    retina.perceive(images[0])
+    seconds = []
+    for image in images[:calls]:
+        start = time.perf_counter()
+        retina.perceive(image)
+        seconds.append(time.perf_counter() - start)
+    return float(np.median(seconds) * 1000)
+
+def agreement(reference, vectors):
+    """Cosine between matching rows (Retina vectors are already unit length): mean, min."""
+    cosine = np.sum(reference.astype(np.float64) * vectors, axis=1)
+    return float(cosine.mean()), float(cosine.min())
+
+def exam_accuracy(retina, train, test):
+    brain = CorpusCallosum()
+    evolve_in_dreams(brain, retina, train)
+    accuracy, _ = evaluate_brain(brain, retina, test)
+    return accuracy
+
+def benchmark_retina(samples=500, backends=BACKENDS, resolutions=(None,), batch_size=64, workers=(0,)):
+    train = load_mnist(limit=samples, train=True)
+    test = load_mnist(limit=samples, train=False)
+    images = [image for image, _ in test]
+    calibration = [image for image, _ in train[:64]]
+
+    results = []
+    reference = None
+    for backend in backends:
+        for resolution in resolutions:
+            for n_workers in workers:
+                retina = Retina(backend=backend, calibration_images=calibration, resolution=resolution,
+                                preprocess_workers=n_workers)
+                vectors = retina.perceive_batch(images, batch_size=batch_size)
+                if reference is None:
+                    reference = vectors
+                cosine_mean, cosine_min = agreement(reference, vectors)
+                results.append({
+                    'backend': backend,
+                    'resolution': resolution or 224,
+                    'workers': n_workers,
+                    'images_per_s': throughput(retina, images, batch_size),
+                    'latency_ms': latency(retina, images),
+                    'cosine_mean': cosine_mean,
+                    'cosine_min': cosine_min,
+                    'accuracy': exam_accuracy(retina, train, test),
+                })
+                retina.close()
+    for row in results:
+        row['accuracy_delta'] = row['accuracy'] - results[0]['accuracy']
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument('--samples', type=int, default=500)
+    parser.add_argument('--backends', nargs='+', default=list(BACKENDS), choices=BACKENDS)
+    parser.add_argument('--resolutions', nargs='+', type=int, default=[0])
+    parser.add_argument('--workers', nargs='+', type=int, default=[0])
+    args = parser.parse_args()
+
+    results = benchmark_retina(args.samples, args.backends, [r or None for r in args.resolutions],
+                               workers=args.workers)
+    print(f"\n{'backend':<8} {'px':>4} {'wk':>3} {'img/s':>8} {'p50 ms':>7} {'cos mean':>9} {'cos min':>8} {'acc %':>7} {'delta':>7}")
+    for row in results:
+        print(f"{row['backend']:<8} {row['resolution']:>4} {row['workers']:>3} {row['images_per_s']:>8.1f} {row['latency_ms']:>7.2f} {row['cosine_mean']:>9.4f} "
+              f"{row['cosine_min']:>8.4f} {row['accuracy']:>7.2f} {row['accuracy_delta']:>+7.2f}")
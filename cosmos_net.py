@@ -1,16 +1,20 @@
 import numpy as np
 import time
-import matplotlib.pyplot as plt
-import matplotlib.cm as cm
-from matplotlib.lines import Line2D
 
 import pickle
 import os
 import io
-import networkx as nx
-from sklearn.manifold import TSNE
-from PIL import Image, ImageOps
-import plotly.graph_objects as go
+import sys
+import json
+import struct
+import zlib
+import atexit
+import threading
+import uuid
+import hashlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+# 可视化依赖 (scikit-learn, plotly) 见 star_map.py，按需加载 (v11.0: headless import = NumPy only)
 
 # --- 1. 基础物理与组件 ---
 
@@ -34,159 +38,1047 @@ class MemoryStar:
     """
     Cosmos-Net 的基本单元：记忆恒星 (Memory Star)
     v9.0 Upgrade: Now supports Hierarchy (Children).
+    v11.0: A star is a lightweight *view* into one row of a StarPool.
+    A freshly constructed star owns a private one-row pool; appending it to a
+    galaxy copies the row in and rebinds the view to the galaxy.
+    Slotted (no __dict__, no unused radius): a view costs two references.
     """
+    __slots__ = ('_pool', '_index')
+
     def __init__(self, vector, label, creation_time=None):
-        self.vector = vector
-        self.label = label
-        self.creation_time = creation_time if creation_time else time.time()
-        self.mass = 1        # 质量 (被唤醒次数)
-        self.children = []   # v9.0: Sub-stars (子恒星/具体实例)
-        self.radius = 0.95   # v9.0: Concept Radius (The more massive, the tighter/looser?)
+        self._pool = StarPool()
+        self._index = self._pool.add(vector, label, creation_time)
+
+    @classmethod
+    def _view(cls, pool, index):
+        star = cls.__new__(cls)
+        star._pool = pool
+        star._index = index
+        return star
+
+    @property
+    def vector(self):
+        return self._pool._vectors[self._index]
+
+    @vector.setter
+    def vector(self, value):
+        self._pool.move(self._index, value)
+
+    @property
+    def label(self):
+        return self._pool._labels[self._index]
+
+    @label.setter
+    def label(self, value):
+        self._pool._labels[self._index] = value
+
+    @property
+    def creation_time(self):
+        return float(self._pool._times[self._index])
+
+    @creation_time.setter
+    def creation_time(self, value):
+        self._pool._times[self._index] = value
+
+    @property
+    def mass(self):
+        return int(self._pool._masses[self._index])    # 质量 (被唤醒次数)
+
+    @mass.setter
+    def mass(self, value):
+        self._pool._masses[self._index] = value
+
+    @property
+    def children(self):
+        # v9.0: Sub-stars (子恒星/具体实例)
+        return self._pool.children_of(self._index, create=True)
+
+    @children.setter
+    def children(self, value):
+        self._pool._children[self._index] = StarPool.from_stars(value)
 
     def is_category(self):
-        return len(self.children) > 0
+        return self._pool.is_category(self._index)
+
+    def __getstate__(self):
+        # Pickle as the legacy (v9/v10) attribute layout so archives stay portable.
+        children = self._pool.children_of(self._index)
+        return {
+            'vector': np.array(self.vector),
+            'label': self.label,
+            'creation_time': self.creation_time,
+            'mass': self.mass,
+            'children': list(children) if children is not None else [],
+        }
+
+    def __setstate__(self, state):
+        # Accepts both the v11 layout and pre-v11 MemoryStar.__dict__ pickles.
+        self._pool = StarPool()
+        self._index = self._pool.add(state['vector'], state['label'], state.get('creation_time'))
+        self._pool._masses[self._index] = state.get('mass', 1)
+        if state.get('children'):
+            self._pool._children[self._index] = StarPool.from_stars(state['children'])
+
+class StarPool:
+    """
+    v11.0: Struct-of-Arrays storage for one layer of the galaxy.
+    Star vectors live in a single growable, contiguous float32 matrix; label,
+    mass and creation_time are parallel columns. Children pools are created
+    lazily, so most stars never pay for a hierarchy.
+    Iterating or indexing yields MemoryStar views (for the UI); the hot path
+    works on `vectors` / `labels` / `masses` directly.
+    """
+    __slots__ = ('_size', '_vectors', '_labels', '_masses', '_times', '_children', '_subscribers')
+
+    def __init__(self, dim=None):
+        self._size = 0
+        self._vectors = np.empty((0, dim or 0), dtype=np.float32)
+        self._labels = np.empty(0, dtype=object)
+        self._masses = np.empty(0, dtype=np.int64)
+        self._times = np.empty(0, dtype=np.float64)
+        self._children = []
+        self._subscribers = []
+
+    @classmethod
+    def from_columns(cls, vectors, labels, masses, creation_times):
+        """A pool over existing column arrays, without copying (e.g. memory-mapped rows)."""
+        pool = cls(vectors.shape[1])
+        pool._size = len(masses)
+        pool._vectors = vectors
+        pool._labels = labels
+        pool._masses = masses
+        pool._times = creation_times
+        pool._children = [None] * pool._size
+        return pool
+
+    @classmethod
+    def from_stars(cls, stars):
+        if isinstance(stars, StarPool):
+            return stars
+        pool = cls()
+        for star in stars:
+            pool.append(star)
+        return pool
+
+    # --- Columns (views trimmed to the live size) ---
+    @property
+    def vectors(self):
+        return self._vectors[:self._size]
+
+    @property
+    def labels(self):
+        return self._labels[:self._size]
+
+    @property
+    def masses(self):
+        return self._masses[:self._size]
+
+    @property
+    def creation_times(self):
+        return self._times[:self._size]
+
+    @property
+    def dim(self):
+        return self._vectors.shape[1]
+
+    # --- Sequence protocol (MemoryStar views) ---
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [MemoryStar._view(self, i) for i in range(*index.indices(self._size))]
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("StarPool index out of range")
+        return MemoryStar._view(self, index)
+
+    def __iter__(self):
+        for i in range(self._size):
+            yield MemoryStar._view(self, i)
+
+    # --- Growth ---
+    def _reserve(self, capacity, dim):
+        if self._size == 0 and self._vectors.shape[1] != dim:
+            self._vectors = np.empty((0, dim), dtype=np.float32)
+        if capacity <= len(self._vectors):
+            return
+        new_capacity = max(capacity, 2 * len(self._vectors), 16)
+        vectors = np.empty((new_capacity, dim), dtype=np.float32)
+        vectors[:self._size] = self._vectors[:self._size]
+        self._vectors = vectors
+        for name, dtype in (('_labels', object), ('_masses', np.int64), ('_times', np.float64)):
+            column = np.empty(new_capacity, dtype=dtype)
+            column[:self._size] = getattr(self, name)[:self._size]
+            setattr(self, name, column)
+
+    def add(self, vector, label, creation_time=None, mass=1, children=None):
+        """Append one star row and return its index."""
+        vector = np.asarray(vector)
+        self._reserve(self._size + 1, vector.shape[0])
+        i = self._size
+        self._vectors[i] = vector
+        self._labels[i] = label
+        self._masses[i] = mass
+        self._times[i] = creation_time if creation_time else time.time()
+        self._children.append(children)
+        self._size += 1
+        self._notify('add', i)
+        return i
+
+    def move(self, index, vector):
+        """Overwrite one star's vector (reinforcement, consolidation)."""
+        self._vectors[index] = vector
+        self._notify('move', index)
+
+    # --- Change notification (indexes, batch scoring) ---
+    def subscribe(self, callback):
+        """callback(event, index) is called after every 'add' / 'move' on this pool."""
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        self._subscribers.remove(callback)
+
+    def _notify(self, event, index):
+        for callback in self._subscribers:
+            callback(event, index)
+
+    def append(self, star):
+        """Copy a MemoryStar into this pool and rebind it as a view of the new row."""
+        i = self.add(star.vector, star.label, star.creation_time, star.mass,
+                     star._pool.children_of(star._index))
+        star._pool, star._index = self, i
+        return i
+
+    def extend(self, other):
+        for i in range(len(other)):
+            self.add(other._vectors[i], other._labels[i], other._times[i],
+                     other._masses[i], other._children[i])
+
+    def take(self, indices):
+        """New pool holding the given rows (in order). Children pools are shared, not copied."""
+        indices = np.asarray(indices, dtype=np.intp)
+        pool = StarPool(self.dim)
+        pool._size = len(indices)
+        pool._vectors = np.ascontiguousarray(self._vectors[indices])
+        pool._labels = self._labels[indices]
+        pool._masses = self._masses[indices]
+        pool._times = self._times[indices]
+        pool._children = [self._children[i] for i in indices]
+        return pool
+
+    # --- Hierarchy ---
+    def children_of(self, index, create=False):
+        if self._children[index] is None and create:
+            self._children[index] = StarPool(self.dim)
+        return self._children[index]
+
+    def is_category(self, index):
+        children = self._children[index]
+        return children is not None and len(children) > 0
+
+    def category_mask(self):
+        return np.array([c is not None and len(c) > 0 for c in self._children[:self._size]], dtype=bool)
+
+    def count_all(self):
+        """Number of stars in this pool and every descendant pool."""
+        return self._size + sum(c.count_all() for c in self._children if c is not None)
+
+    def subtree_offsets(self):
+        """Position of each row in the depth-first get_all_stars() order of this pool."""
+        sizes = np.ones(self._size, dtype=np.int64)
+        for i, c in enumerate(self._children[:self._size]):
+            if c is not None:
+                sizes[i] += c.count_all()
+        return np.cumsum(sizes) - sizes
+
+    def memory_usage(self, _seen_labels=None):
+        """
+        Bytes held by this pool and every descendant pool, by kind:
+        vectors / columns (mass, time, label refs) / labels (distinct label objects) /
+        hierarchy (pool objects, children lists) / spare (reserved but unused capacity).
+        """
+        seen = set() if _seen_labels is None else _seen_labels
+        live = self._size
+        spare_rows = len(self._vectors) - live
+        column_row = self._masses.itemsize + self._times.itemsize + self._labels.itemsize
+        usage = {
+            'stars': live,
+            'vectors': self._vectors[:live].nbytes,
+            'columns': live * column_row,
+            'labels': 0,
+            'hierarchy': sys.getsizeof(self) + sys.getsizeof(self._children),
+            'spare': spare_rows * (self._vectors.itemsize * self.dim + column_row),
+        }
+        for label in self._labels[:live]:
+            if id(label) not in seen:
+                seen.add(id(label))
+                usage['labels'] += sys.getsizeof(label)
+        for c in self._children[:live]:
+            if c is not None:
+                for key, value in c.memory_usage(seen).items():
+                    usage[key] += value
+        return usage
+
+    # --- Persistence (drop spare capacity) ---
+    def __getstate__(self):
+        return {
+            'vectors': np.array(self.vectors),
+            'labels': np.array(self.labels),
+            'masses': np.array(self.masses),
+            'creation_times': np.array(self.creation_times),
+            'children': list(self._children),
+        }
+
+    def __setstate__(self, state):
+        self._size = len(state['masses'])
+        self._vectors = state['vectors']
+        self._labels = state['labels']
+        self._masses = state['masses']
+        self._times = state['creation_times']
+        self._children = state['children']
+        self._subscribers = []
+
+class GalaxyIndex:
+    """
+    v11.0: Inverted-file (IVF) index for approximate perception over a StarPool.
+    Stars are bucketed under their nearest spherical k-means centroid; a query only
+    scans the stars of its `n_probe` closest buckets. n_probe is the recall/latency
+    knob (n_probe >= n_lists is an exact scan).
+    The index subscribes to the pool, so memorize() inserts and merge_matter() moves
+    are reflected immediately; a replaced pool (dream) is re-attached on next use.
+    """
+    def __init__(self, pool, n_lists=None, n_probe=16, iterations=10, seed=0):
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.iterations = iterations
+        self.seed = seed
+        self.centroids = None
+        self.pool = None
+        self.attach(pool)
+
+    @classmethod
+    def from_centroids(cls, centroids, trained_size, n_lists=None, n_probe=16, iterations=10, seed=0):
+        """A trained but unattached index (e.g. loaded from disk); buckets fill on first attach()."""
+        index = cls.__new__(cls)
+        index.n_lists = n_lists
+        index.n_probe = n_probe
+        index.iterations = iterations
+        index.seed = seed
+        index.centroids = centroids
+        index._trained_size = trained_size
+        index.pool = None
+        index._assignment, index._lists, index._arrays = [], [], {}
+        return index
+
+    # --- Training ---
+    def train(self):
+        """Spherical k-means on (a sample of) the pool's star vectors."""
+        vectors = self.pool.vectors
+        n_lists = min(self.n_lists or max(1, int(np.sqrt(len(vectors)))), len(vectors))
+        rng = np.random.RandomState(self.seed)
+        sample = vectors[np.sort(rng.choice(len(vectors), min(len(vectors), 64 * n_lists), replace=False))]
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+
+        for _ in range(self.iterations):
+            assignment = self._nearest(sample, centroids)
+            counts = np.bincount(assignment, minlength=n_lists)
+            filled = counts > 0 # Empty buckets keep their old centroid
+            starts = (np.cumsum(counts) - counts)[filled]
+            sums = np.add.reduceat(sample[np.argsort(assignment, kind='stable')], starts, axis=0)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            norms[norms == 0] = 1
+            centroids[filled] = sums / norms
+
+        self.centroids = centroids
+        self._trained_size = len(vectors)
+
+    def outgrown(self):
+        return self.centroids is not None and len(self.pool) > 4 * self._trained_size
+
+    @staticmethod
+    def _nearest(vectors, centroids, chunk=1 << 14):
+        return np.concatenate([np.argmax(vectors[lo:lo + chunk] @ centroids.T, axis=1)
+                               for lo in range(0, len(vectors), chunk)] or [np.empty(0, dtype=np.intp)])
+
+    # --- Synchronisation with the pool ---
+    def attach(self, pool):
+        """(Re)bind to a pool: retrain if it outgrew the centroids, then bucket every star."""
+        if self.pool is not None:
+            self.pool.unsubscribe(self._on_change)
+        self.pool = pool
+        pool.subscribe(self._on_change)
+        if len(pool) and (self.centroids is None or self.centroids.shape[1] != pool.dim
+                          or len(pool) > 4 * self._trained_size):
+            self.train()
+        self._assignment = []
+        self._lists = [[] for _ in range(0 if self.centroids is None else len(self.centroids))]
+        self._arrays = {}
+        if self.centroids is not None:
+            for i, l in enumerate(self._nearest(pool.vectors, self.centroids)):
+                self._assignment.append(int(l))
+                self._lists[l].append(i)
+
+    def _on_change(self, event, index):
+        if self.centroids is None:
+            self.attach(self.pool)
+            return
+        bucket = int(np.argmax(self.centroids @ self.pool._vectors[index]))
+        if event == 'add':
+            self._assignment.append(bucket)
+        else:
+            old = self._assignment[index]
+            if old == bucket:
+                return
+            self._lists[old].remove(index)
+            self._arrays.pop(old, None)
+            self._assignment[index] = bucket
+        self._lists[bucket].append(index)
+        self._arrays.pop(bucket, None)
+
+    def _bucket(self, l):
+        if l not in self._arrays:
+            self._arrays[l] = np.array(self._lists[l], dtype=np.intp)
+        return self._arrays[l]
+
+    # --- Search ---
+    def probe_batch(self, X):
+        """The n_probe closest buckets per query row (N x n_probe), or None for the exact scan."""
+        if self.centroids is None or self.n_probe >= len(self.centroids):
+            return None
+        scores = np.atleast_2d(np.asarray(X, dtype=np.float32)) @ self.centroids.T
+        return np.argpartition(-scores, self.n_probe - 1, axis=1)[:, :self.n_probe]
+
+    def candidates(self, x):
+        """Sorted pool rows to scan for query x, or None to fall back to the exact scan."""
+        probes = self.probe_batch(x)
+        if probes is None:
+            return None
+        rows = np.concatenate([self._bucket(l) for l in probes[0]])
+        if not len(rows):
+            return None
+        rows.sort()
+        return rows
+
+    def nbytes(self):
+        """Approximate memory of the centroids and inverted lists."""
+        if self.centroids is None:
+            return 0
+        rows = len(self._assignment)
+        return (self.centroids.nbytes + sys.getsizeof(self._assignment)
+                + sum(sys.getsizeof(l) for l in self._lists)
+                + sum(a.nbytes for a in self._arrays.values())
+                + rows * sys.getsizeof(rows)) # One int object per bucketed row
+
+    def __getstate__(self):
+        # Buckets are derived state; rebuilt by attach() on load.
+        state = self.__dict__.copy()
+        for key in ('_assignment', '_lists', '_arrays'):
+            state.pop(key, None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        pool, self.pool = self.pool, None
+        self.attach(pool)
+
+def consolidate_partition(vectors, masses, threshold, tolerance=1e-3, block_size=512, exact_survivors=64):
+    """
+    v11.0: Greedy dream merge of one label partition (rows sorted heaviest first).
+    Each star merges into the first surviving star with gravity > threshold, else survives.
+    Each block of stars is screened with float32 GEMMs against the survivors at block start
+    and against itself; screened hits, and survivors that absorbed a star since the block
+    started, are then checked exactly. While only a few stars survive, all of them are
+    checked exactly instead.
+    Pure NumPy (no pools, no stars) so dream() can fan partitions out to worker processes.
+    Returns (survivor positions, merges, vectors, masses); merges lists (survivor, absorbed)
+    position pairs in merge order, vectors/masses are the updated partition columns.
+    """
+    vectors = np.array(vectors, dtype=np.float32)
+    masses = np.array(masses, dtype=np.int64)
+    n = len(vectors)
+    kept = np.zeros(n, dtype=bool)
+    survivors = []
+    merges = []
+    cutoff = threshold - tolerance
+
+    for lo in range(0, n, block_size):
+        hi = min(n, lo + block_size)
+        screened_survivors = np.array(survivors, dtype=np.intp)
+        block = vectors[lo:hi]
+        outer = (block @ vectors[screened_survivors].T) > cutoff
+        inner = (block @ block.T) > cutoff
+        absorbed = []  # Survivors whose vector moved after screening
+
+        # We iterate through sorted stars. If a star is close to an existing 'kept' star, merge it.
+        # Otherwise, keep it.
+        for i in range(lo, hi):
+            r = i - lo
+            if len(survivors) <= exact_survivors:
+                candidates = np.array(survivors, dtype=np.intp)
+            else:
+                candidates = np.concatenate([screened_survivors[outer[r]],
+                                             lo + np.flatnonzero(inner[r, :r] & kept[lo:i]),
+                                             np.array(absorbed, dtype=np.intp)])
+            if len(candidates):
+                star = vectors[i].astype(np.float64)
+                exact = (vectors[candidates] * star).sum(axis=1)
+                hits = candidates[exact > threshold] # Extremely similar
+                if len(hits):
+                    # Merge star INTO kept_star
+                    # Weighted average of vectors
+                    k = int(hits.min())
+                    total_mass = masses[k] + masses[i]
+                    rate = masses[i] / total_mass
+                    vectors[k] = CosmosPhysics.merge_matter(vectors[k], star, rate)
+                    masses[k] = total_mass
+                    merges.append((k, i))
+                    absorbed.append(k)
+                    continue
+
+            kept[i] = True
+            survivors.append(i)
+
+    return np.flatnonzero(kept), merges, vectors, masses
+
+def consolidate_partition_lsh(vectors, masses, threshold, n_tables=8, n_bits=None, seed=0):
+    """
+    v11.0: Approximate consolidate_partition via random-hyperplane LSH.
+    Survivors are bucketed by an n_bits sign signature in each of n_tables tables; a star is
+    only checked (exactly) against survivors sharing a bucket with it in some table, and a
+    survivor is re-hashed whenever it absorbs a star. Same greedy rule and return value as
+    consolidate_partition, but merges between stars that never collide are missed.
+    n_bits=None picks the largest signature with >= 50% per-table collision at the threshold.
+    """
+    vectors = np.array(vectors, dtype=np.float32)
+    masses = np.array(masses, dtype=np.int64)
+    n, dim = vectors.shape
+    if n_bits is None:
+        collision = 1.0 - np.arccos(np.clip(threshold, -1.0, 1.0)) / np.pi # Per-bit collision probability
+        n_bits = int(np.log(0.5) / np.log(collision)) if collision < 1.0 else 24
+    n_bits = int(np.clip(n_bits, 1, 24))
+
+    planes = np.random.RandomState(seed).normal(size=(dim, n_tables * n_bits)).astype(np.float32)
+    weights = (1 << np.arange(n_bits)).astype(np.int64)
+
+    def signatures(rows):
+        bits = (rows @ planes > 0).reshape(len(rows), n_tables, n_bits)
+        return bits @ weights
+
+    codes = signatures(vectors)
+    tables = [{} for _ in range(n_tables)]
+    survivors = []
+    merges = []
+
+    for i in range(n):
+        candidates = set()
+        for t in range(n_tables):
+            candidates.update(tables[t].get(codes[i, t], ()))
+        if candidates:
+            candidates = np.fromiter(candidates, dtype=np.intp, count=len(candidates))
+            star = vectors[i].astype(np.float64)
+            exact = (vectors[candidates] * star).sum(axis=1)
+            hits = candidates[exact > threshold]
+            if len(hits):
+                k = int(hits.min())
+                total_mass = masses[k] + masses[i]
+                rate = masses[i] / total_mass
+                vectors[k] = CosmosPhysics.merge_matter(vectors[k], star, rate)
+                masses[k] = total_mass
+                merges.append((k, i))
+                # The survivor moved: re-bucket it
+                new_codes = signatures(vectors[k:k + 1])[0]
+                for t in range(n_tables):
+                    if new_codes[t] != codes[k, t]:
+                        tables[t][codes[k, t]].discard(k)
+                        tables[t].setdefault(new_codes[t], set()).add(k)
+                codes[k] = new_codes
+                continue
+
+        survivors.append(i)
+        for t in range(n_tables):
+            tables[t].setdefault(codes[i, t], set()).add(i)
+
+    return np.array(survivors, dtype=np.intp), merges, vectors, masses
 
 class RightHemisphere:
     """
     v10.0: The Intuitive Core (Formerly CosmosResonator)
     Responsible for: Vector Similarity, Gravity, Perception, Art.
     Thinking System: Fast, Associative.
+    v11.0: The galaxy is a StarPool; perception is one matrix-vector product,
+    or an approximate (IVF) lookup once build_index() is called.
     """
+    # Below this many root stars an exact scan beats the index.
+    index_min_stars = 2048
+
     def __init__(self):
-        self.galaxy = []  # Root nodes
+        self.galaxy = StarPool()  # Root nodes
         self.resonance_threshold = 0.85
         self.mitosis_threshold = 5
+        self.index = None         # Optional GalaxyIndex (approximate perception)
+
+    def __setstate__(self, state):
+        # Migration: pre-v11 brains stored the galaxy as a list of MemoryStar objects.
+        self.__dict__.update(state)
+        self.__dict__.setdefault('index', None)
+        if not isinstance(self.galaxy, StarPool):
+            self.galaxy = StarPool.from_stars(self.galaxy)
+
+    # --- Approximate Perception ---
+    def build_index(self, n_lists=None, n_probe=16):
+        """Enable IVF-based approximate perception. Learning (memorize) always stays exact."""
+        self.index = GalaxyIndex(self.galaxy, n_lists=n_lists, n_probe=n_probe)
+        return self.index
+
+    def drop_index(self):
+        """Back to the exact scan."""
+        if self.index is not None and self.index.pool is not None:
+            self.index.pool.unsubscribe(self.index._on_change)
+        self.index = None
+
+    def _active_index(self, pool):
+        if self.index is None or pool is not self.galaxy or len(pool) < self.index_min_stars:
+            return None
+        if self.index.pool is not pool or self.index.outgrown():
+            self.index.attach(pool) # Galaxy was replaced (dream) or grew past its centroids
+        return self.index
+
+    def index_report(self, X, n_probes=(1, 2, 4, 8, 16, 32, 64)):
+        """
+        recall@1 of approximate perception against the exact scan, plus per-query latency
+        (amortized over perceive_batch), for each n_probe setting. Use it to pick the operating point.
+        """
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        index = self.index
+        self.index = None
+        start = time.time()
+        _, _, exact = self.perceive_batch(X)
+        exact_ms = (time.time() - start) * 1000 / max(len(X), 1)
+        self.index = index
+
+        report = []
+        original_probe = index.n_probe
+        try:
+            for n_probe in n_probes:
+                index.n_probe = n_probe
+                start = time.time()
+                _, _, approx = self.perceive_batch(X)
+                report.append({
+                    'n_probe': n_probe,
+                    'recall@1': float(np.mean(approx == exact)),
+                    'ann_ms': (time.time() - start) * 1000 / max(len(X), 1),
+                    'exact_ms': exact_ms,
+                })
+        finally:
+            index.n_probe = original_probe
+        return report
+
+    # Upper bound on query x star gravity entries materialized at once (64 MB of float32).
+    batch_chunk_elements = 1 << 24
+    # float32 BLAS screening tolerance (relative to |x|); candidates this close to the max are re-scored.
+    screening_tolerance = 1e-3
+
+    def _best_index(self, pool, x, tie_break=True, gravities=None, rows=None):
+        """
+        Single-query _best_indices (GEMV screening unless `gravities` are given, same exact re-scoring).
+        rows: restrict the search to these sorted pool rows (index candidates).
+        """
+        x = np.asarray(x, dtype=np.float64)
+        vectors = pool.vectors if rows is None else pool.vectors[rows]
+        if gravities is None:
+            gravities = vectors @ x.astype(np.float32)
+        top = gravities.max()
+        candidates = (gravities >= top - self.screening_tolerance * np.sqrt(x @ x)).nonzero()[0]
+        if not len(candidates):
+            candidates = np.array([gravities.argmax()])
+        exact = (vectors[candidates] * x).sum(axis=1)
+        if rows is not None:
+            candidates = rows[candidates]
+        if len(candidates) == 1:
+            return int(candidates[0]), float(exact[0])
+        top = exact.max()
+        winners = candidates[exact == top]
+        if tie_break and len(winners) > 1:
+            times = pool.creation_times[winners]
+            winners = winners[times == times.max()]
+        return int(winners[0]), float(top)
 
-    def perceive(self, input_vec, pool=None):
-        """Standard Cosmos-Net Perception"""
+    def _best_indices(self, pool, X, tie_break=True):
+        """
+        Best star per query row: (indices, gravities).
+        Gravities are screened with one float32 GEMM, then the near-max candidates are
+        re-scored in float64 row by row, so a single query and a batch always agree
+        regardless of how BLAS blocks the product.
+        tie_break: equal gravity -> newest creation_time wins (perceive); otherwise first in pool order (memorize).
+        """
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        X32 = X.astype(np.float32)
+        tolerance = self.screening_tolerance * np.sqrt(np.einsum('ij,ij->i', X, X))
+        vectors = pool.vectors
+
+        best = np.empty(len(X), dtype=np.intp)
+        max_gravity = np.empty(len(X), dtype=np.float64)
+        step = max(1, self.batch_chunk_elements // max(len(pool), 1))
+        for lo in range(0, len(X), step):
+            gravities = X32[lo:lo + step] @ vectors.T
+            screened = np.argmax(gravities, axis=1)
+            best[lo:lo + step] = screened
+            max_gravity[lo:lo + step] = gravities[np.arange(len(gravities)), screened]
+
+            rows, cols = np.nonzero(gravities >= (max_gravity[lo:lo + step] - tolerance[lo:lo + step])[:, None])
+            self._rescore(pool, X, lo + rows, cols, best, max_gravity, tie_break)
+        return best, max_gravity
+
+    @staticmethod
+    def _rescore(pool, X, rows, cols, best, max_gravity, tie_break=True):
+        """Exact re-scoring of near-max (row, star) pairs; writes each row's winner into best/max_gravity."""
+        exact = np.sum(pool.vectors[cols] * X[rows], axis=1)
+        times = pool.creation_times[cols] if tie_break else np.zeros(len(cols))
+        order = np.lexsort((cols, -times, -exact, rows))
+        winners = order[np.r_[True, rows[order][1:] != rows[order][:-1]]] if len(order) else order
+        best[rows[winners]] = cols[winners]
+        max_gravity[rows[winners]] = exact[winners]
+
+    def _best_indices_indexed(self, pool, X, index):
+        """
+        _best_indices restricted to each row's probed buckets: one GEMM per bucket over the
+        rows that probe it. Same answers as perceive() with the index, row by row.
+        """
+        X32 = X.astype(np.float32)
+        tolerance = self.screening_tolerance * np.sqrt(np.einsum('ij,ij->i', X, X))
+        probes = index.probe_batch(X32)
+        if probes is None:
+            return self._best_indices(pool, X)
+
+        best = np.zeros(len(X), dtype=np.intp)
+        max_gravity = np.full(len(X), -np.inf)
+        pairs = []
+        for bucket in np.unique(probes):
+            cols = index._bucket(bucket)
+            if not len(cols):
+                continue
+            rows = np.flatnonzero((probes == bucket).any(axis=1))
+            gravities = X32[rows] @ pool.vectors[cols].T
+            local_max = gravities.max(axis=1)
+            np.maximum.at(max_gravity, rows, local_max)
+            r, c = np.nonzero(gravities >= (local_max - tolerance[rows])[:, None])
+            pairs.append((rows[r], cols[c], gravities[r, c]))
+
+        if not pairs: # Every probed bucket was empty
+            return self._best_indices(pool, X)
+        rows, cols, gravities = (np.concatenate(p) for p in zip(*pairs))
+        near = gravities >= max_gravity[rows] - tolerance[rows]
+        self._rescore(pool, X, rows[near], cols[near], best, max_gravity, tie_break=True)
+
+        missing = np.flatnonzero(np.isneginf(max_gravity)) # Only empty buckets probed
+        if len(missing):
+            best[missing], max_gravity[missing] = self._best_indices(pool, X[missing])
+        return best, max_gravity
+
+    def perceive(self, input_vec, pool=None, gravities=None, approximate=True):
+        """
+        Standard Cosmos-Net Perception
+        gravities: optional precomputed float32 screening of input_vec against `pool` (batch paths).
+        approximate: use the galaxy index if one is built (learning passes False).
+        """
         if pool is None:
             pool = self.galaxy
 
         if not pool:
             return None, 0.0
 
-        candidates = []
-        for star in pool:
-            gravity = CosmosPhysics.compute_gravity(star.vector, input_vec)
-            candidates.append((star, gravity))
-
-        candidates.sort(key=lambda x: (x[1], getattr(x[0], 'creation_time', 0)), reverse=True)
-        best_star, max_gravity = candidates[0]
+        index = self._active_index(pool) if approximate and gravities is None else None
+        rows = index.candidates(input_vec) if index else None
+        best, max_gravity = self._best_index(pool, input_vec, gravities=gravities, rows=rows)
 
-        if max_gravity > self.resonance_threshold and best_star.is_category():
-            child_best, child_gravity = self.perceive(input_vec, pool=best_star.children)
+        if max_gravity > self.resonance_threshold and pool.is_category(best):
+            child_best, child_gravity = self.perceive(input_vec, pool=pool.children_of(best))
             if child_best and child_gravity > max_gravity:
                  return child_best, child_gravity
 
-        return best_star, max_gravity
+        return pool[best], max_gravity
 
-    def memorize(self, x, y, pool=None):
-        """Standard Cosmos-Net Gravity Memory + Mitosis"""
+    def perceive_batch(self, X, pool=None):
+        """
+        Batched perceive: one GEMM against the pool, category descent per batch.
+        Returns (labels, gravities, indices); indices are positions in get_all_stars() order,
+        -1 where there is no star. Matches calling perceive() row by row.
+        """
+        if pool is None:
+            pool = self.galaxy
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+
+        labels = np.full(len(X), None, dtype=object)
+        gravities = np.zeros(len(X), dtype=np.float64)
+        indices = np.full(len(X), -1, dtype=np.int64)
+        if not pool or len(X) == 0:
+            return labels, gravities, indices
+
+        index = self._active_index(pool)
+        if index:
+            best, max_gravity = self._best_indices_indexed(pool, X, index)
+        else:
+            best, max_gravity = self._best_indices(pool, X)
+        offsets = pool.subtree_offsets()
+        labels[:] = pool.labels[best]
+        gravities[:] = max_gravity
+        indices[:] = offsets[best]
+
+        descend = (gravities > self.resonance_threshold) & pool.category_mask()[best]
+        for i in np.unique(best[descend]):
+            rows = np.flatnonzero(descend & (best == i))
+            c_labels, c_gravities, c_indices = self.perceive_batch(X[rows], pool=pool.children_of(i))
+            better = (c_indices >= 0) & (c_gravities > gravities[rows])
+            rows = rows[better]
+            labels[rows] = c_labels[better]
+            gravities[rows] = c_gravities[better]
+            indices[rows] = offsets[i] + 1 + c_indices[better]
+
+        return labels, gravities, indices
+
+    def memorize(self, x, y, pool=None, gravities=None, creation_time=None):
+        """
+        Standard Cosmos-Net Gravity Memory + Mitosis
+        gravities: optional precomputed float32 screening of x against the target pool (batch paths).
+        creation_time: timestamp for a newly created star (journal replay); defaults to now.
+        """
         x = CosmosPhysics.normalize(x)
         current_galaxy = pool if pool is not None else self.galaxy
-        
-        best_star = None
-        max_gravity = -1.0
-        
+
         # Local search (non-recursive for decision making)
-        for star in current_galaxy:
-            gravity = CosmosPhysics.compute_gravity(x, star.vector)
+        best = None
+        max_gravity = -1.0
+        if current_galaxy:
+            i, gravity = self._best_index(current_galaxy, x, tie_break=False, gravities=gravities)
             if gravity > max_gravity:
-                max_gravity = gravity
-                best_star = star
-                
+                best, max_gravity = i, gravity
+
         # Case A: Resonance Found
-        if best_star is not None and best_star.label == y and max_gravity > self.resonance_threshold:
-            if best_star.mass > self.mitosis_threshold:
-                return self.memorize(x, y, pool=best_star.children)
+        if best is not None and current_galaxy._labels[best] == y and max_gravity > self.resonance_threshold:
+            if current_galaxy._masses[best] > self.mitosis_threshold:
+                return self.memorize(x, y, pool=current_galaxy.children_of(best, create=True),
+                                     creation_time=creation_time)
             else:
-                best_star.vector = CosmosPhysics.merge_matter(best_star.vector, x)
-                best_star.mass += 1
+                current_galaxy.move(best, CosmosPhysics.merge_matter(current_galaxy._vectors[best], x))
+                current_galaxy._masses[best] += 1
                 return f"Reinforce (Right Brain: {y})"
-                
+
         # Case B: Novelty
         else:
-            new_star = MemoryStar(x, y)
-            current_galaxy.append(new_star)
+            current_galaxy.add(x, y, creation_time)
             if pool is not None:
                 return "Mitosis (Right Brain Branch)"
             else:
                 return "New_Creation (Right Brain Star)"
 
-    def dream(self, threshold=0.99, noise_level=0.0):
+    def _screen(self, X, chunk_size):
+        """
+        Yield (row, gravities) for each row of X in order, where gravities are the float32
+        screening of the row against the *live* root galaxy. One GEMM per chunk scores the
+        galaxy as it was at the chunk start; stars moved or created since are patched in,
+        so callers may memorize between rows.
+        """
+        for lo in range(0, len(X), chunk_size):
+            chunk = X[lo:lo + chunk_size]
+            galaxy = self.galaxy
+            base = len(galaxy)
+            if base:
+                snapshot = chunk.astype(np.float32) @ galaxy.vectors.T
+            else:
+                snapshot = np.empty((len(chunk), 0), dtype=np.float32)
+            moved = set()
+
+            def track(event, index):
+                if event == 'move' and index < base:
+                    moved.add(index)
+
+            galaxy.subscribe(track)
+            try:
+                for x, gravities in zip(chunk, snapshot):
+                    x32 = x.astype(np.float32)
+                    if moved:
+                        rows = np.fromiter(moved, dtype=np.intp, count=len(moved))
+                        gravities = gravities.copy()
+                        gravities[rows] = galaxy._vectors[rows] @ x32
+                    if len(galaxy) > base:
+                        gravities = np.concatenate([gravities, galaxy._vectors[base:len(galaxy)] @ x32])
+                    yield x, gravities
+            finally:
+                galaxy.unsubscribe(track)
+
+    def memorize_batch(self, X, y, chunk_size=256):
+        """
+        memorize() for every (X[i], y[i]) in order, with identical results.
+        The root galaxy is scored with one GEMM per chunk instead of one scan per sample.
+        Returns the list of action messages.
+        """
+        X = np.asarray(X, dtype=np.float64)
+        unit = np.array([CosmosPhysics.normalize(x) for x in X])
+        return [self.memorize(x, label, gravities=gravities)
+                for x, (_, gravities), label in zip(X, self._screen(unit, chunk_size), y)]
+
+    # Stars per label consolidated against one similarity block at a time.
+    dream_block_size = 512
+    # While a label has at most this many survivors, skip screening and check them all exactly.
+    dream_exact_survivors = 64
+    # Approximate (LSH) dream: hash tables and signature bits per table (None = from threshold).
+    lsh_tables = 8
+    lsh_bits = None
+
+    def dream(self, threshold=0.99, noise_level=0.0, workers=None, executor='process', include_children=False,
+              approximate=False, lsh_tables=None, lsh_bits=None):
         """
         The Dreamtime: Memory Consolidation & Pruning.
         1. Prune: Remove weak memories (Mass <= 2).
         2. Consolidate: Merge very similar stars (Gravity > threshold).
         3. Noise (Sleep Spindles): Inject random noise to escape local optima.
+        Per-phase wall time (seconds) is kept in self.dream_timings.
+
+        workers: fan label partitions out to this many 'process' or 'thread' workers
+                 (None = consolidate in this thread). Results are identical either way.
+        include_children: also consolidate every category's children pool, level by level.
+        approximate: only compare stars whose LSH buckets collide (lsh_tables, lsh_bits);
+                     see lsh_report() for how many merges that misses.
+        lsh_tables / lsh_bits: override self.lsh_tables / self.lsh_bits for this dream.
         """
+        lsh = (self.lsh_tables if lsh_tables is None else lsh_tables,
+               self.lsh_bits if lsh_bits is None else lsh_bits)
         start_count = len(self.galaxy)
-        
+        timings = {}
+        phase_start = time.perf_counter()
+
         # 1. Prune (Forget Noise)
         # Keep stars that are either "Heavy" (Verified) OR "Young" (Just learned)
         # We don't have 'age' strictly tracked per iterate, but we can trust Mass for now.
         # Let's say mass=1 is vulnerable.
         # EXCEPT: If total galaxy is small, don't kill it.
         if start_count > 50:
-            self.galaxy = [s for s in self.galaxy if s.mass > 1]
-        
+            self.galaxy = self.galaxy.take(np.flatnonzero(self.galaxy.masses > 1))
+
         pruned_count = start_count - len(self.galaxy)
+        timings['prune'] = time.perf_counter() - phase_start
+        phase_start = time.perf_counter()
 
         # 1.5 Noise Injection (Sleep Spindles - The Dialectical Leap)
         # Maybe chaos helps us find better order?
-        if noise_level > 0.0:
-            for star in self.galaxy:
-                # Add noise to normalized vector
-                perturbation = np.random.normal(0, noise_level, star.vector.shape)
-                star.vector += perturbation
-                # Re-normalize to maintain cosine similarity validity
-                norm = np.linalg.norm(star.vector)
-                if norm > 0:
-                     star.vector /= norm
-        
+        if noise_level > 0.0 and self.galaxy:
+            vectors = self.galaxy.vectors
+            # Add noise to normalized vectors
+            vectors += np.random.normal(0, noise_level, vectors.shape)
+            # Re-normalize to maintain cosine similarity validity
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            np.divide(vectors, norms, out=vectors, where=norms > 0)
+
+        timings['noise'] = time.perf_counter() - phase_start
+        phase_start = time.perf_counter()
+
         # 2. Consolidate (Merge Similarity)
         # Simple greedy approach: Sort by mass (preserve important ones), then merge smaller into larger.
-        self.galaxy.sort(key=lambda s: s.mass, reverse=True)
-        
-        merged_count = 0
-        new_galaxy = []
-        
-        # We iterate through sorted stars. If a star is close to an existing 'kept' star, merge it.
-        # Otherwise, keep it.
-        for star in self.galaxy:
-            merged = False
-            for kept_star in new_galaxy:
-                if star.label == kept_star.label: # Only merge same concepts
-                    gravity = CosmosPhysics.compute_gravity(star.vector, kept_star.vector)
-                    if gravity > threshold: # Extremely similar
-                        # Merge star INTO kept_star
-                        # Weighted average of vectors
-                        total_mass = kept_star.mass + star.mass
-                        rate = star.mass / total_mass
-                        kept_star.vector = CosmosPhysics.merge_matter(kept_star.vector, star.vector, rate)
-                        kept_star.mass = total_mass
-                        
-                        # Merge children if any
-                        kept_star.children.extend(star.children)
-                        
-                        merged = True
-                        merged_count += 1
-                        break
-            
-            if not merged:
-                new_galaxy.append(star)
-                
-        self.galaxy = new_galaxy
+        pool_executor = None
+        if workers:
+            pool_executor = (ProcessPoolExecutor if executor == 'process' else ThreadPoolExecutor)(workers)
+        try:
+            merged_count = 0
+            level = [(None, None, self.galaxy)]  # (owner pool, owner row, pool)
+            while level:
+                consolidated, merged = self._consolidate_level([pool for _, _, pool in level], threshold,
+                                                               pool_executor, approximate, lsh)
+                merged_count += merged
+                for (owner, row, _), pool in zip(level, consolidated):
+                    if owner is None:
+                        self.galaxy = pool
+                    else:
+                        owner._children[row] = pool
+                if not include_children:
+                    break
+                level = [(pool, i, pool._children[i]) for pool in consolidated
+                         for i in range(len(pool)) if pool.is_category(i)]
+        finally:
+            if pool_executor is not None:
+                pool_executor.shutdown()
+
         final_count = len(self.galaxy)
-        
-        return f"Dream Cycle Complete. Pruned: {pruned_count}, Merged: {merged_count}. Stars: {start_count} -> {final_count}"
+        timings['consolidate'] = time.perf_counter() - phase_start
+        self.dream_timings = timings
+
+        phases = ", ".join(f"{name} {seconds * 1000:.1f}ms" for name, seconds in timings.items())
+        return f"Dream Cycle Complete. Pruned: {pruned_count}, Merged: {merged_count}. Stars: {start_count} -> {final_count} ({phases})"
+
+    def _consolidate_level(self, pools, threshold, pool_executor=None, approximate=False, lsh=None):
+        """
+        Consolidate independent pools at once: every (pool, label) partition is one task.
+        lsh: (tables, bits) of the approximate pass, default (self.lsh_tables, self.lsh_bits).
+        Returns (consolidated pools, merged count).
+        """
+        pools = [pool.take(np.argsort(-pool.masses, kind='stable')) for pool in pools]
+
+        # Only merge same concepts: every label is an independent greedy pass.
+        tasks = []
+        for p, pool in enumerate(pools):
+            groups = {}
+            for i, label in enumerate(pool.labels):
+                groups.setdefault(label, []).append(i)
+            tasks.extend((p, np.array(rows, dtype=np.intp)) for rows in groups.values())
+        tasks.sort(key=lambda task: -len(task[1])) # Largest partitions first (load balance)
+
+        if approximate:
+            consolidate = consolidate_partition_lsh
+            n_tables, n_bits = lsh or (self.lsh_tables, self.lsh_bits)
+            args = [(pools[p].vectors[rows], pools[p].masses[rows], threshold, n_tables, n_bits)
+                    for p, rows in tasks]
+        else:
+            consolidate = consolidate_partition
+            args = [(pools[p].vectors[rows], pools[p].masses[rows], threshold, self.screening_tolerance,
+                     self.dream_block_size, self.dream_exact_survivors) for p, rows in tasks]
+        if pool_executor is not None:
+            results = pool_executor.map(consolidate, *zip(*args)) if args else []
+        else:
+            results = (consolidate(*a) for a in args)
+
+        kept = [[] for _ in pools]
+        merged_count = 0
+        for (p, rows), (survivors, merges, vectors, masses) in zip(tasks, results):
+            pool = pools[p]
+            pool._vectors[rows] = vectors
+            pool._masses[rows] = masses
+            # Merge children if any
+            for k, s in merges:
+                if pool.is_category(rows[s]):
+                    pool.children_of(rows[k], create=True).extend(pool.children_of(rows[s]))
+            kept[p].append(rows[survivors])
+            merged_count += len(merges)
+
+        return [pool.take(np.sort(np.concatenate(k)) if k else []) for pool, k in zip(pools, kept)], merged_count
+
+    def lsh_report(self, threshold=0.99, sample_size=5000, seed=0):
+        """
+        Merges the approximate (LSH) dream misses versus the exact one, measured on a random
+        sample of the root galaxy. Neither galaxy is modified.
+        """
+        rng = np.random.RandomState(seed)
+        rows = np.sort(rng.choice(len(self.galaxy), min(sample_size, len(self.galaxy)), replace=False))
+        sample = self.galaxy.take(rows)
+        sample._children = [None] * len(sample) # Only root vectors matter; never touch shared child pools
+
+        report = {'sample': len(rows), 'lsh_tables': self.lsh_tables, 'lsh_bits': self.lsh_bits}
+        for name, approximate in (('exact', False), ('lsh', True)):
+            start = time.perf_counter()
+            pools, merged = self._consolidate_level([sample], threshold, approximate=approximate)
+            report[f'{name}_merges'] = merged
+            report[f'{name}_stars'] = len(pools[0])
+            report[f'{name}_seconds'] = time.perf_counter() - start
+        report['missed_merges'] = report['exact_merges'] - report['lsh_merges']
+        report['missed_rate'] = report['missed_merges'] / max(report['exact_merges'], 1)
+        return report
 
     def get_all_stars(self, pool=None):
         if pool is None: pool = self.galaxy
         all_stars = []
         for s in pool:
             all_stars.append(s)
-            if s.children:
+            if s.is_category():
                 all_stars.extend(self.get_all_stars(s.children))
         return all_stars
 
@@ -241,9 +1133,34 @@ class LeftHemisphere:
             
         return features, is_pixel_data
 
-    def memorize(self, x, y):
-        """Update statistical models (Online Welford's Algorithm or simple accumulation)"""
-        features, valid = self._extract_features(x)
+    def _extract_features_batch(self, X):
+        """Row-wise _extract_features for an N x D matrix (same arithmetic, vectorized)."""
+        is_pixel_data = (X.shape[1] == 784)
+
+        features = {'density': np.sum(np.abs(X), axis=1)}
+
+        if is_pixel_data:
+            img = X.reshape(-1, 28, 28)
+            h_proj = np.sum(img, axis=2)
+            w_proj = np.sum(img, axis=1)
+
+            h_non_zero = np.count_nonzero(h_proj > 0.1, axis=1)
+            w_non_zero = np.count_nonzero(w_proj > 0.1, axis=1)
+            w_non_zero[w_non_zero == 0] = 1
+            features['aspect_ratio'] = h_non_zero / w_non_zero
+
+            center_mass = np.sum(img[:, 7:21, 7:21], axis=(1, 2))
+            total_mass = np.sum(X, axis=1) + 1e-6
+            features['center_ratio'] = center_mass / total_mass
+
+        return features, is_pixel_data
+
+    def memorize(self, x, y, extracted=None):
+        """
+        Update statistical models (Online Welford's Algorithm or simple accumulation)
+        extracted: optional precomputed _extract_features(x) result.
+        """
+        features, valid = extracted if extracted is not None else self._extract_features(x)
         if not valid: return # Can't do geometry on MobileNet vectors yet
         
         if y not in self.knowledge_base:
@@ -263,13 +1180,14 @@ class LeftHemisphere:
             
             self.knowledge_base[y][key] = [n, mean, m2]
 
-    def perceive(self, input_vec):
+    def perceive(self, input_vec, extracted=None):
         """
         Analyze fit with known distributions.
         Returns: (BestLabel, ConfidenceScore)
         ConfidenceScore is based on how many Standard Deviations away the input is.
+        extracted: optional precomputed _extract_features(input_vec) result.
         """
-        features, valid = self._extract_features(input_vec)
+        features, valid = extracted if extracted is not None else self._extract_features(input_vec)
         if not valid or not self.knowledge_base: return None, 0.0
         
         best_label = None
@@ -307,12 +1225,63 @@ class LeftHemisphere:
         else:
             return None, 0.0 # Logic is confused
 
+    def perceive_batch(self, X):
+        """
+        Batched perceive over an N x D matrix.
+        Returns (labels, confidences); label is None where logic is confused.
+        """
+        X = np.atleast_2d(np.asarray(X))
+        labels = np.full(len(X), None, dtype=object)
+        confidences = np.zeros(len(X), dtype=np.float64)
+
+        features, valid = self._extract_features_batch(X)
+        if not valid or not self.knowledge_base or len(X) == 0:
+            return labels, confidences
+
+        # Average z-score of every input against every known class (inf = no usable stats)
+        known_labels = list(self.knowledge_base)
+        deviations = np.full((len(known_labels), len(X)), np.inf)
+        for j, label in enumerate(known_labels):
+            stats = self.knowledge_base[label]
+            total_z_score = np.zeros(len(X))
+            count = 0
+            for key, val in features.items():
+                if key in stats:
+                    n, mean, m2 = stats[key]
+                    if n < 2: continue
+                    variance = m2 / (n - 1)
+                    std_dev = np.sqrt(variance) + 1e-6
+                    total_z_score += np.abs(val - mean) / std_dev
+                    count += 1
+            if count > 0:
+                deviations[j] = total_z_score / count
+
+        best = np.argmin(deviations, axis=0)
+        min_deviation = deviations[best, np.arange(len(X))]
+        best_labels = np.empty(len(known_labels), dtype=object)
+        best_labels[:] = known_labels
+        best_labels = best_labels[best]
+
+        high = min_deviation < 1.0
+        moderate = ~high & (min_deviation < 2.0)
+        labels[high | moderate] = best_labels[high | moderate]
+        confidences[high] = 1.0
+        confidences[moderate] = 0.5
+        return labels, confidences
+
 class CorpusCallosum:
     """
     v10.0: The Bridge (Manager)
     Resolves conflicts between Right (Intuition) and Left (Logic).
     Mechanism: Dynamic Equilibrium (Dominance Shifting).
     """
+    # v11.0: Sequence number of the last journaled event applied (see BrainJournal).
+    journal_seq = 0
+    # v11.0: Lineage of this brain in a journal (assigned on first journaled event; survives reset).
+    brain_id = None
+    # v11.0: Version of the Retina whose vectors this brain learned (None = not recorded).
+    retina_version = None
+
     def __init__(self):
         self.right_hemisphere = RightHemisphere()
         self.left_hemisphere = LeftHemisphere()
@@ -356,13 +1325,42 @@ class CorpusCallosum:
             dummy_star.mass = 0 # Ephemeral
             return dummy_star, l_conf
 
-    def memorize(self, x, y):
+    def perceive_batch(self, X):
+        """
+        Batched perceive over an N x D matrix.
+        Returns (labels, scores, star_indices). star_indices point into get_all_stars();
+        -1 marks a Left Brain win (or an empty galaxy).
+        """
+        r_labels, r_grav, r_idx = self.right_hemisphere.perceive_batch(X)
+        l_labels, l_conf = self.left_hemisphere.perceive_batch(X)
+
+        r_score = r_grav * self.dominance
+        l_score = l_conf * (1.0 - self.dominance)
+
+        right_wins = r_score >= l_score
+        labels = np.where(right_wins, r_labels, l_labels)
+        scores = np.where(right_wins, r_grav, l_conf)
+        indices = np.where(right_wins, r_idx, -1)
+        return labels, scores, indices
+
+    def memorize(self, x, y, gravities=None, creation_time=None):
         """
         Co-Evolution & Dynamic Adaptation
+        Single pass: the root galaxy is scored once and the geometric features are extracted
+        once; both feed the hind-sight check and both hemispheres' updates.
+        gravities: optional float32 screening of normalize(x) against the root galaxy (memorize_batch).
+        creation_time: timestamp for a new Right Brain star (journal replay).
         """
+        galaxy = self.right_hemisphere.galaxy
+        if gravities is None and galaxy:
+            gravities = galaxy.vectors @ CosmosPhysics.normalize(x).astype(np.float32)
+        extracted = self.left_hemisphere._extract_features(x)
+
         # 1. Check "Who WOULD have been right?" (Hind-sight)
-        r_star, r_grav = self.right_hemisphere.perceive(x)
-        l_label, l_conf = self.left_hemisphere.perceive(x)
+        r_star, r_grav = self.right_hemisphere.perceive(
+            x, gravities=None if gravities is None else gravities * np.float32(np.linalg.norm(x)),
+            approximate=False)
+        l_label, l_conf = self.left_hemisphere.perceive(x, extracted=extracted)
         
         r_correct = (r_star is not None and r_star.label == y)
         l_correct = (l_label == y)
@@ -386,29 +1384,74 @@ class CorpusCallosum:
 
         # 3. Cross-Education (Both Learn from the Truth)
         # "Inhibit Expression, Not Learning"
-        self.left_hemisphere.memorize(x, y)
-        r_msg = self.right_hemisphere.memorize(x, y)
+        self.left_hemisphere.memorize(x, y, extracted=extracted)
+        r_msg = self.right_hemisphere.memorize(x, y, gravities=gravities, creation_time=creation_time)
         
         return f"{r_msg} | {status_msg}"
 
-    def dream(self, threshold=0.99, noise_level=0.0):
+    def memorize_batch(self, X, y, chunk_size=256):
+        """
+        memorize() for every (X[i], y[i]) in order, with identical results
+        (see RightHemisphere.memorize_batch). Returns the list of action messages.
+        """
+        X = np.asarray(X, dtype=np.float64)
+        unit = np.array([CosmosPhysics.normalize(x) for x in X])
+        screened = self.right_hemisphere._screen(unit, chunk_size)
+        return [self.memorize(x, label, gravities=gravities)
+                for x, (_, gravities), label in zip(X, screened, y)]
+
+    def dream(self, threshold=0.99, noise_level=0.0, workers=None, executor='process', include_children=False,
+              approximate=False, lsh_tables=None, lsh_bits=None):
         """
         Enter The Dreamtime.
+        workers / executor / include_children / approximate / lsh_tables / lsh_bits:
+        see RightHemisphere.dream.
         """
         # 1. Right Brain consolidates memories
-        r_msg = self.right_hemisphere.dream(threshold=threshold, noise_level=noise_level)
+        r_msg = self.right_hemisphere.dream(threshold=threshold, noise_level=noise_level, workers=workers,
+                                            executor=executor, include_children=include_children,
+                                            approximate=approximate, lsh_tables=lsh_tables, lsh_bits=lsh_bits)
         
         # 2. Left Brain could also prune outliers? (Future)
         
         return f"💤 {r_msg}"
-        
+
+    def memory_report(self):
+        """
+        Brain memory footprint in bytes: Right Brain star storage by kind (see
+        StarPool.memory_usage), its index, the Left Brain statistics, total and bytes per star.
+        """
+        right = self.right_hemisphere
+        report = right.galaxy.memory_usage()
+        report['index'] = right.index.nbytes() if right.index is not None else 0
+        report['left_hemisphere'] = _deep_sizeof(self.left_hemisphere.knowledge_base)
+        report['total'] = sum(value for key, value in report.items() if key != 'stars')
+        report['bytes_per_star'] = report['total'] / report['stars'] if report['stars'] else 0.0
+        return report
+
     def get_all_stars(self):
         return self.right_hemisphere.get_all_stars()
 
+def _deep_sizeof(obj):
+    """sys.getsizeof including the contents of dicts, lists and tuples."""
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_deep_sizeof(k) + _deep_sizeof(v) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(_deep_sizeof(v) for v in obj)
+    return size
+
 # --- 2. 存档系统 ---
 DEFAULT_SAVE_FILE = "cosmos_brain.pkl"
 
 def save_brain(brain, filename=DEFAULT_SAVE_FILE):
+    write_snapshot(snapshot_brain(brain, filename), filename)
+
+def snapshot_brain(brain, filename=DEFAULT_SAVE_FILE):
+    """
+    v11.0: What save_brain(brain, filename) would write, copied into memory, so that
+    write_snapshot() (the slow part) can run while the brain keeps learning.
+    """
     # Fix for pickling classes defined in __main__ (Streamlit issue)
     # We map current classes to module level to handle hot-reloading
     try:
@@ -427,8 +1470,24 @@ def save_brain(brain, filename=DEFAULT_SAVE_FILE):
     except Exception as e:
         print(f"Warning: Could not rebind classes: {e}")
     
-    with open(filename, 'wb') as f:
-        pickle.dump(brain, f)
+    if filename.endswith(COLUMNAR_EXTENSION):
+        return _columnar_snapshot(brain)
+    return pickle.dumps(brain)
+
+def write_snapshot(snapshot, filename=DEFAULT_SAVE_FILE):
+    if isinstance(snapshot, bytes):
+        _replace_file(filename, lambda f: f.write(snapshot))
+    else:
+        _write_columnar(filename, *snapshot)
+
+def _replace_file(filename, write):
+    """write(f) into a temp file, fsync it, then atomically rename it over filename."""
+    tmp_filename = filename + ".tmp"
+    with open(tmp_filename, 'wb') as f:
+        write(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_filename, filename)
 
 class CosmosUnpickler(pickle.Unpickler):
     def find_class(self, module, name):
@@ -445,128 +1504,689 @@ class CosmosUnpickler(pickle.Unpickler):
 # Alias for backward compatibility during Unpickling if strictly needed
 CosmosResonator = RightHemisphere 
 
+def _load_brain_file(filename):
+    if filename.endswith(DELTA_EXTENSION):
+        return load_brain_delta(filename), f"✅ 成功唤醒双院制大脑: {filename}"
+    if is_columnar_brain(filename):
+        return load_brain_columnar(filename), f"✅ 成功唤醒双院制大脑: {filename}"
+
+    with open(filename, 'rb') as f:
+        brain = CosmosUnpickler(f).load()
+
+    # v10.0 Migration: If we loaded an old RightHemisphere (CosmosResonator),
+    # wrap it in a CorpusCallosum.
+    if isinstance(brain, RightHemisphere): # CosmosResonator is alias
+        print("🧠 Evolving Brain to v10.0 (Bicameral)...")
+        new_brain = CorpusCallosum()
+        new_brain.right_hemisphere = brain # Transfer the old galaxy
+        new_brain.journal_seq = getattr(brain, 'journal_seq', 0)
+        return new_brain, f"✅ 大脑已进化为双院制心智 (v10.0). Old memories preserved in Right Hemisphere."
+
+    return brain, f"✅ 成功唤醒双院制大脑: {filename}"
+
 def load_or_create_brain(filename=DEFAULT_SAVE_FILE):
     if os.path.exists(filename):
         try:
-            with open(filename, 'rb') as f:
-                brain = CosmosUnpickler(f).load()
-            
-            # v10.0 Migration: If we loaded an old RightHemisphere (CosmosResonator),
-            # wrap it in a CorpusCallosum.
-            if isinstance(brain, RightHemisphere): # CosmosResonator is alias
-                print("🧠 Evolving Brain to v10.0 (Bicameral)...")
-                new_brain = CorpusCallosum()
-                new_brain.right_hemisphere = brain # Transfer the old galaxy
-                return new_brain, f"✅ 大脑已进化为双院制心智 (v10.0). Old memories preserved in Right Hemisphere."
-            
-            return brain, f"✅ 成功唤醒双院制大脑: {filename}"
+            brain, msg = _load_brain_file(filename)
         except Exception as e:
             return CorpusCallosum(), f"⚠️ 唤醒失败 ({str(e)})，正在创建新大脑..."
-    return CorpusCallosum(), f"✨ 创建新大脑 ({filename})..."
+    else:
+        brain, msg = CorpusCallosum(), f"✨ 创建新大脑 ({filename})..."
+
+    # v11.0: Re-apply the events journaled since the snapshot was written.
+    try:
+        brain, replayed = replay_journal(brain, filename)
+        if replayed:
+            msg += f" (+{replayed} journal events)"
+    except Exception as e:
+        msg += f" ⚠️ Journal replay stopped ({str(e)})"
+    return brain, msg
+
+# --- v11.0: 列式存档 (Columnar brain format, *.cosmos) ---
+# One file: magic, header length, JSON header, then 64-byte aligned raw arrays
+# (float32 vectors, label ids, masses, creation times, parent rows, index centroids).
+# Star rows are stored pool by pool, breadth first: the root galaxy, then every category's
+# children as one contiguous run, so each StarPool is a zero-copy slice of the mapped arrays.
+# Loading maps the file copy-on-write: pages are shared between processes until written,
+# and in-memory learning never modifies the file.
+COLUMNAR_EXTENSION = ".cosmos"
+BRAIN_MAGIC = b"COSMOSB1"
+_ALIGN = 64
+
+def _aligned(offset):
+    return -(-offset // _ALIGN) * _ALIGN
+
+def _json_default(obj):
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Cannot store {type(obj).__name__} in a brain header")
+
+def is_columnar_brain(filename):
+    with open(filename, 'rb') as f:
+        return f.read(len(BRAIN_MAGIC)) == BRAIN_MAGIC
+
+def save_brain_columnar(brain, filename):
+    """Write brain as a .cosmos file (atomically: temp file + rename)."""
+    _write_columnar(filename, *_columnar_snapshot(brain))
+
+def _star_table(brain):
+    """Every Right Brain star as columns, pool by pool breadth first, with parent rows."""
+    # Breadth-first runs of (pool, global row of its parent star); the list grows while iterated.
+    runs = [(brain.right_hemisphere.galaxy, -1)]
+    offset = 0
+    for pool, _ in runs:
+        for i in range(len(pool)):
+            if pool.is_category(i):
+                runs.append((pool._children[i], offset + i))
+        offset += len(pool)
+
+    return {
+        'vectors': np.concatenate([pool.vectors for pool, _ in runs]).astype(np.float32, copy=False),
+        'labels': np.concatenate([pool.labels for pool, _ in runs]),
+        'masses': np.concatenate([pool.masses for pool, _ in runs]),
+        'creation_times': np.concatenate([pool.creation_times for pool, _ in runs]),
+        'parents': np.concatenate([np.full(len(pool), parent, dtype=np.int64) for pool, parent in runs]),
+    }
+
+def _brain_state(brain):
+    """Everything but the stars, as a JSON-able dict, plus the index centroids (or None)."""
+    right, left = brain.right_hemisphere, brain.left_hemisphere
+    index, centroids = None, None
+    if right.index is not None:
+        index = {'n_lists': right.index.n_lists, 'n_probe': right.index.n_probe,
+                 'iterations': right.index.iterations, 'seed': right.index.seed}
+        if right.index.centroids is not None:
+            index['trained_size'] = right.index._trained_size
+            centroids = right.index.centroids.copy()
+    state = {
+        'journal_seq': getattr(brain, 'journal_seq', 0),
+        'brain_id': getattr(brain, 'brain_id', None),
+        'retina_version': getattr(brain, 'retina_version', None),
+        'dominance': brain.dominance,
+        'learning_rate': brain.learning_rate,
+        'right': {'resonance_threshold': right.resonance_threshold,
+                  'mitosis_threshold': right.mitosis_threshold,
+                  'index': index},
+        'left': {'confidence_threshold': left.confidence_threshold,
+                 # Pairs, not a dict: JSON object keys would turn every label into a string
+                 'knowledge_base': [[label, stats] for label, stats in left.knowledge_base.items()]},
+    }
+    return state, centroids
+
+def _restore_brain(state, table, centroids=None):
+    """Inverse of _brain_state / _star_table. The star columns are used without copying."""
+    brain = CorpusCallosum()
+    brain.journal_seq = state.get('journal_seq', 0)
+    brain.brain_id = state.get('brain_id')
+    brain.retina_version = state.get('retina_version')
+    brain.dominance = state['dominance']
+    brain.learning_rate = state['learning_rate']
+    left = brain.left_hemisphere
+    left.confidence_threshold = state['left']['confidence_threshold']
+    left.knowledge_base = {label: stats for label, stats in state['left']['knowledge_base']}
+
+    right = brain.right_hemisphere
+    right.resonance_threshold = state['right']['resonance_threshold']
+    right.mitosis_threshold = state['right']['mitosis_threshold']
+    vectors, parents = table['vectors'], table['parents']
+    right.galaxy = StarPool(vectors.shape[1])
+    if len(parents):
+        bounds = np.concatenate([[0], np.flatnonzero(np.diff(parents)) + 1, [len(parents)]])
+        runs = []
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            pool = StarPool.from_columns(vectors[lo:hi], table['labels'][lo:hi], table['masses'][lo:hi],
+                                         table['creation_times'][lo:hi])
+            parent = parents[lo]
+            if parent < 0:
+                right.galaxy = pool
+            else:
+                r = np.searchsorted(bounds, parent, side='right') - 1
+                runs[r]._children[parent - bounds[r]] = pool
+            runs.append(pool)
+
+    index = state['right']['index']
+    if index is not None:
+        settings = {key: index[key] for key in ('n_lists', 'n_probe', 'iterations', 'seed')}
+        if centroids is not None:
+            right.index = GalaxyIndex.from_centroids(np.array(centroids), index['trained_size'], **settings)
+        else:
+            right.index = GalaxyIndex(right.galaxy, **settings)
+    return brain
+
+def _columnar_snapshot(brain):
+    """(header bytes, [(file offset, array), ...]) of a .cosmos file; the arrays are copies."""
+    table = _star_table(brain)
+    state, centroids = _brain_state(brain)
+    vocab = {}
+    arrays = {
+        'vectors': table['vectors'],
+        'label_ids': np.array([vocab.setdefault(label, len(vocab)) for label in table['labels']], dtype=np.int32),
+        'masses': table['masses'],
+        'creation_times': table['creation_times'],
+        'parents': table['parents'],
+    }
+    if centroids is not None:
+        arrays['index_centroids'] = centroids
+
+    header = dict(state, version=1, labels=list(vocab), arrays={})
+    position = 0
+    for name, array in arrays.items():
+        header['arrays'][name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': position}
+        position = _aligned(position + array.nbytes)
+    header_bytes = json.dumps(header, default=_json_default, ensure_ascii=False).encode('utf-8')
+    data_start = _aligned(len(BRAIN_MAGIC) + 8 + len(header_bytes))
+    return header_bytes, [(data_start + header['arrays'][name]['offset'], array) for name, array in arrays.items()]
+
+def _write_columnar(filename, header_bytes, chunks):
+    def write(f):
+        f.write(BRAIN_MAGIC)
+        f.write(struct.pack('<Q', len(header_bytes)))
+        f.write(header_bytes)
+        for offset, array in chunks:
+            f.seek(offset)
+            f.write(np.ascontiguousarray(array).tobytes())
+    # Replacing (not overwriting) keeps pages of a currently mapped brain valid.
+    _replace_file(filename, write)
+
+def load_brain_columnar(filename):
+    """Map a .cosmos file into a CorpusCallosum without copying the star columns."""
+    with open(filename, 'rb') as f:
+        if f.read(len(BRAIN_MAGIC)) != BRAIN_MAGIC:
+            raise ValueError(f"{filename} is not a columnar brain")
+        (header_length,) = struct.unpack('<Q', f.read(8))
+        header = json.loads(f.read(header_length).decode('utf-8'))
+    data_start = _aligned(len(BRAIN_MAGIC) + 8 + header_length)
+    return _brain_from_columns(header, lambda spec, shape: np.memmap(
+        filename, dtype=spec['dtype'], mode='c', shape=shape, offset=data_start + spec['offset']).view(np.ndarray))
+
+def _brain_from_columns(header, column):
+    """Brain of a .cosmos header; column(spec, shape) returns the stored (non-empty) array."""
+    columns = {}
+    for name, spec in header['arrays'].items():
+        shape = tuple(spec['shape'])
+        columns[name] = np.empty(shape, dtype=spec['dtype']) if 0 in shape else column(spec, shape)
+
+    columns['labels'] = np.array(header['labels'], dtype=object)[columns['label_ids']]
+    return _restore_brain(header, columns, columns.get('index_centroids'))
+
+# --- v11.0: 共享快照 (Shared-memory brain snapshot for read-only workers) ---
+
+def share_brain(brain):
+    """
+    Copy brain into a new SharedMemory block, laid out like a .cosmos file.
+    Workers open it by name and attach_brain(shm.buf); the owner closes and unlinks it.
+    """
+    header_bytes, chunks = _columnar_snapshot(brain)
+    size = max([len(BRAIN_MAGIC) + 8 + len(header_bytes)] + [offset + array.nbytes for offset, array in chunks])
+    shm = SharedMemory(create=True, size=size)
+    buffer = shm.buf
+    buffer[:len(BRAIN_MAGIC)] = BRAIN_MAGIC
+    struct.pack_into('<Q', buffer, len(BRAIN_MAGIC), len(header_bytes))
+    start = len(BRAIN_MAGIC) + 8
+    buffer[start:start + len(header_bytes)] = header_bytes
+    for offset, array in chunks:
+        if array.size:
+            np.ndarray(array.shape, dtype=array.dtype, buffer=buffer, offset=offset)[...] = array
+    return shm
+
+def attach_brain(buffer):
+    """
+    CorpusCallosum over a share_brain() buffer; the star columns are views, not copies.
+    Treat it as read-only (perceive/perceive_batch): it shares its memory with every other reader.
+    """
+    if bytes(buffer[:len(BRAIN_MAGIC)]) != BRAIN_MAGIC:
+        raise ValueError("Not a shared brain snapshot")
+    (header_length,) = struct.unpack_from('<Q', buffer, len(BRAIN_MAGIC))
+    start = len(BRAIN_MAGIC) + 8
+    header = json.loads(bytes(buffer[start:start + header_length]).decode('utf-8'))
+    data_start = _aligned(start + header_length)
+    return _brain_from_columns(header, lambda spec, shape: np.ndarray(
+        shape, dtype=spec['dtype'], buffer=buffer, offset=data_start + spec['offset']))
+
+# --- v11.0: 增量存档 (Delta snapshots, *.delta) ---
+# A delta stores one brain version against a base brain file (.cosmos or .pkl):
+# for every star, the base row it descends from (-1 if new), vectors only for new or
+# moved stars, mass changes, and the full non-star state. Stars removed by dream are
+# simply never referenced. Integer columns are delta-coded and everything is zlib
+# compressed (np.savez_compressed), so a checkpoint costs roughly its changes.
+# Stars are matched by creation_time (which merges and reinforcement never change).
+# The header holds a digest of the base's star table: a base file rewritten in place (same
+# star count, reinforced vectors) is detected instead of silently mis-applied.
+DELTA_EXTENSION = ".delta"
+
+def _table_digest(table):
+    """blake2b of a star table's contents (independent of the file format it came from)."""
+    digest = hashlib.blake2b(digest_size=16)
+    for name in ('vectors', 'masses', 'creation_times', 'parents'):
+        column = np.ascontiguousarray(table[name])
+        digest.update(f"{name}|{column.dtype.str}|{column.shape}|".encode())
+        digest.update(column.tobytes())
+    digest.update(json.dumps(list(table['labels']), default=_json_default, ensure_ascii=False).encode('utf-8'))
+    return digest.hexdigest()
+
+def _occurrence(times):
+    """Rank of each row among the rows sharing its creation_time, in row order."""
+    order = np.argsort(times, kind='stable')
+    rows = np.arange(len(times))
+    first = np.ones(len(times), dtype=bool)
+    first[1:] = times[order][1:] != times[order][:-1]
+    rank = np.empty(len(times), dtype=np.int64)
+    rank[order] = rows - np.maximum.accumulate(np.where(first, rows, 0))
+    return rank
+
+def _match_stars(base, table):
+    """For each star of table, its row in base (same creation_time occurrence and label) or -1."""
+    base_rank, rank = _occurrence(base['creation_times']), _occurrence(table['creation_times'])
+    order = np.lexsort((base_rank, base['creation_times']))
+    base_times = base['creation_times'][order]
+    # Rows sharing a time are consecutive in `order`, ranked 0..k-1: first match + rank.
+    candidate = np.searchsorted(base_times, table['creation_times']) + rank
+    found = candidate < len(order)
+    found[found] &= base_times[candidate[found]] == table['creation_times'][found]
+    source = np.full(len(rank), -1, dtype=np.int64)
+    source[found] = order[candidate[found]]
+    matched = source >= 0
+    matched[matched] &= base['labels'][source[matched]] == table['labels'][matched]
+    source[~matched] = -1
+    return source
+
+def save_brain_delta(brain, base_filename, filename):
+    """Write brain as a delta against the brain stored in base_filename."""
+    base = _star_table(_load_brain_file(base_filename)[0])
+    table = _star_table(brain)
+    state, centroids = _brain_state(brain)
+
+    source = _match_stars(base, table)
+    if table['vectors'].shape[1] != base['vectors'].shape[1]:
+        source[:] = -1 # A different universe (Big Bang with a new retina): nothing to share
+    matched = source >= 0
+    changed = ~matched
+    if matched.any():
+        changed[matched] = np.any(table['vectors'][matched] != base['vectors'][source[matched]], axis=1)
+    base_masses = np.zeros(len(source), dtype=np.int64)
+    base_masses[matched] = base['masses'][source[matched]]
+
+    vocab = {}
+    new_label_ids = np.array([vocab.setdefault(label, len(vocab)) for label in table['labels'][~matched]],
+                             dtype=np.int32)
+    header = {
+        'version': 1,
+        'base': os.path.relpath(base_filename, os.path.dirname(os.path.abspath(filename))),
+        'base_stars': len(base['masses']),
+        'base_digest': _table_digest(base),
+        'dim': table['vectors'].shape[1],
+        'state': state,
+        'labels': list(vocab),
+    }
+    arrays = {
+        'header': np.frombuffer(json.dumps(header, default=_json_default, ensure_ascii=False).encode('utf-8'),
+                                dtype=np.uint8),
+        'source_steps': np.diff(source, prepend=-1),
+        'parent_steps': np.diff(table['parents'], prepend=-1),
+        'changed_steps': np.diff(np.flatnonzero(changed), prepend=-1),
+        'vectors': table['vectors'][changed],
+        'mass_deltas': table['masses'] - base_masses,
+        'new_creation_times': table['creation_times'][~matched],
+        'new_label_ids': new_label_ids,
+    }
+    if centroids is not None:
+        arrays['index_centroids'] = centroids
+    _replace_file(filename, lambda f: np.savez_compressed(f, **arrays))
+
+def load_brain_delta(filename):
+    """Rebuild the brain version stored in a .delta file (its base file must be present)."""
+    with np.load(filename, allow_pickle=False) as data:
+        arrays = {name: data[name] for name in data.files}
+    header = json.loads(arrays['header'].tobytes().decode('utf-8'))
+    base_filename = os.path.join(os.path.dirname(os.path.abspath(filename)), header['base'])
+    base = _star_table(_load_brain_file(base_filename)[0])
+    stale = len(base['masses']) != header['base_stars']
+    if not stale and 'base_digest' in header: # Deltas written before digests only know the star count
+        stale = _table_digest(base) != header['base_digest']
+    if stale:
+        raise ValueError(f"Base brain {base_filename} changed since {filename} was written")
+
+    source = np.cumsum(arrays['source_steps']) - 1
+    matched = source >= 0
+    rows = source[matched]
+    n = len(source)
+
+    vectors = np.empty((n, header['dim']), dtype=np.float32)
+    if len(rows):
+        vectors[matched] = base['vectors'][rows]
+    vectors[np.cumsum(arrays['changed_steps']) - 1] = arrays['vectors']
+    labels = np.empty(n, dtype=object)
+    labels[matched] = base['labels'][rows]
+    labels[~matched] = np.array(header['labels'], dtype=object)[arrays['new_label_ids']]
+    masses = arrays['mass_deltas'].copy()
+    masses[matched] += base['masses'][rows]
+    times = np.empty(n, dtype=np.float64)
+    times[matched] = base['creation_times'][rows]
+    times[~matched] = arrays['new_creation_times']
+
+    table = {'vectors': vectors, 'labels': labels, 'masses': masses, 'creation_times': times,
+             'parents': np.cumsum(arrays['parent_steps']) - 1}
+    return _restore_brain(header['state'], table, arrays.get('index_centroids'))
+
+def convert_brain(filename, target=None):
+    """One-shot conversion of a pickled brain (any version) to the columnar format."""
+    with open(filename, 'rb') as f:
+        brain = CosmosUnpickler(f).load()
+    if isinstance(brain, RightHemisphere): # v9 archive: wrap like load_or_create_brain
+        right, brain = brain, CorpusCallosum()
+        brain.right_hemisphere = right
+        brain.journal_seq = getattr(right, 'journal_seq', 0)
+    target = target or os.path.splitext(filename)[0] + COLUMNAR_EXTENSION
+    save_brain_columnar(brain, target)
+    return target
+
+# --- v11.0: 日志 (Append-only journal, <brain>.journal) ---
+# Every memorize / dream / reset is appended as one record: length, crc32, pickled event.
+# Records carry increasing sequence numbers and the brain remembers the last one it applied
+# (journal_seq, saved with every snapshot), so replay skips what a snapshot already holds,
+# even if the process died between writing a snapshot and truncating the journal.
+# Records also carry the brain's lineage (brain_id): a journal left behind by a different
+# brain bound to the same file (e.g. a new app session) is never applied to this one.
+JOURNAL_SUFFIX = ".journal"
+_RECORD_HEADER = struct.Struct('<II') # payload length, crc32
+_journal_lock = threading.Lock() # Appends vs. truncation from a BackgroundSaver thread
+
+def _read_journal(path):
+    """Yield (end offset, event) for each intact record; stops at a torn or corrupt tail."""
+    with open(path, 'rb') as f:
+        offset = 0
+        while True:
+            head = f.read(_RECORD_HEADER.size)
+            if len(head) < _RECORD_HEADER.size:
+                return
+            length, crc = _RECORD_HEADER.unpack(head)
+            payload = f.read(length)
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                return
+            offset += _RECORD_HEADER.size + length
+            yield offset, pickle.loads(payload)
+
+def _journal_lineage(brain):
+    if getattr(brain, 'brain_id', None) is None:
+        brain.brain_id = uuid.uuid4().hex
+    return brain.brain_id
+
+def _same_lineage(brain, event):
+    # Records written before lineages existed (no 'brain') belong to whichever brain loads them.
+    lineage = event.get('brain')
+    return lineage is None or lineage == getattr(brain, 'brain_id', None)
+
+def _apply_event(brain, event):
+    kind = event['event']
+    if kind == 'memorize':
+        brain.memorize(event['x'], event['y'], creation_time=event['time'])
+    elif kind == 'dream':
+        if 'rng_state' in event: # Noise is random: restore the stream the original dream used
+            np.random.set_state(event['rng_state'])
+        # Records written before these options existed dream with the defaults.
+        brain.dream(threshold=event['threshold'], noise_level=event['noise_level'],
+                    workers=event.get('workers'), executor=event.get('executor', 'process'),
+                    include_children=event.get('include_children', False),
+                    approximate=event.get('approximate', False),
+                    lsh_tables=event.get('lsh_tables'), lsh_bits=event.get('lsh_bits'))
+    elif kind == 'reset':
+        lineage = brain.brain_id
+        brain = CorpusCallosum()
+        brain.brain_id = lineage
+    else:
+        raise ValueError(f"Unknown journal event: {kind}")
+    brain.journal_seq = event['seq']
+    return brain
+
+def replay_journal(brain, filename):
+    """
+    Apply the journaled events of this brain's lineage newer than brain.journal_seq.
+    A torn tail (crash while appending) is cut off. Returns (brain, number of events applied).
+    """
+    path = filename + JOURNAL_SUFFIX
+    if not os.path.exists(path):
+        return brain, 0
+    records = list(_read_journal(path))
+    if getattr(brain, 'brain_id', None) is None and records:
+        # A brain never snapshotted with a lineage (new file, older snapshot) continues the
+        # journal's latest one: that is the session that wrote to this file last.
+        brain.brain_id = records[-1][1].get('brain')
+    replayed = 0
+    intact = 0
+    for intact, event in records:
+        if _same_lineage(brain, event) and event['seq'] > getattr(brain, 'journal_seq', 0):
+            brain = _apply_event(brain, event)
+            replayed += 1
+    if intact < os.path.getsize(path):
+        with open(path, 'r+b') as f:
+            f.truncate(intact)
+    return brain, replayed
+
+def truncate_journal(filename, upto_seq, brain_id=None):
+    """
+    Drop the journaled events a snapshot with journal_seq == upto_seq already contains and,
+    given the snapshot's brain_id, the records of every other lineage (the file is now that brain).
+    """
+    path = filename + JOURNAL_SUFFIX
+    with _journal_lock:
+        if not os.path.exists(path):
+            return
+        with open(path, 'rb') as f:
+            data = f.read()
+        keep = bytearray()
+        start = 0
+        for end, event in _read_journal(path):
+            foreign = brain_id is not None and event.get('brain') not in (None, brain_id)
+            if event['seq'] > upto_seq and not foreign:
+                keep += data[start:end]
+            start = end
+        if len(keep) < len(data):
+            _replace_file(path, lambda f: f.write(keep))
+
+class BrainJournal:
+    """
+    Incremental persistence for one brain file: memorize / dream / reset go through the
+    journal, which applies the event and appends it to <filename>.journal, so a save costs
+    O(vector size) instead of re-writing the whole brain. Every `compact_every` events (or
+    on compact()) the brain is snapshotted and the journal emptied, synchronously with
+    save_brain or, given a BackgroundSaver, on its writer thread.
+    load_or_create_brain replays the journal on top of the snapshot.
+    """
+    def __init__(self, filename=DEFAULT_SAVE_FILE, compact_every=500, fsync=True, saver=None):
+        self.filename = filename
+        self.path = filename + JOURNAL_SUFFIX
+        self.compact_every = compact_every
+        self.fsync = fsync
+        self.saver = saver
+        # Mutations hold the saver's lock so a background snapshot never sees half an update.
+        self.lock = saver.lock if saver is not None else threading.RLock()
+        # Continue after the journal's last record, whoever wrote it, so sequence numbers in
+        # the file only grow and a truncation never keeps stale records of a previous session.
+        events = [event for _, event in _read_journal(self.path)] if os.path.exists(self.path) else []
+        self.pending = len(events)
+        self.last_seq = max((event['seq'] for event in events), default=0)
+
+    def memorize(self, brain, x, y):
+        with self.lock:
+            now = time.time()
+            action = brain.memorize(x, y, creation_time=now)
+            self._append(brain, 'memorize', time=now, x=np.asarray(x), y=y, action=action)
+        return action
+
+    def dream(self, brain, threshold=0.99, noise_level=0.0, workers=None, executor='process',
+              include_children=False, approximate=False, lsh_tables=None, lsh_bits=None):
+        with self.lock:
+            # Record the LSH settings in effect: instance overrides are not part of the snapshot
+            right = brain.right_hemisphere
+            event = {'threshold': threshold, 'noise_level': noise_level, 'workers': workers,
+                     'executor': executor, 'include_children': include_children, 'approximate': approximate,
+                     'lsh_tables': right.lsh_tables if lsh_tables is None else lsh_tables,
+                     'lsh_bits': right.lsh_bits if lsh_bits is None else lsh_bits}
+            if noise_level > 0:
+                event['rng_state'] = np.random.get_state()
+            msg = brain.dream(**{key: value for key, value in event.items() if key != 'rng_state'})
+            self._append(brain, 'dream', **event)
+        return msg
+
+    def reset(self, brain):
+        """Big Bang: returns the fresh brain that replaces `brain`. The journal restarts with the reset."""
+        new_brain = CorpusCallosum()
+        new_brain.journal_seq = getattr(brain, 'journal_seq', 0)
+        new_brain.brain_id = _journal_lineage(brain)
+        with self.lock:
+            self._append(new_brain, 'reset', replace=True)
+        return new_brain
+
+    def compact(self, brain):
+        """Fold the journal into a full snapshot (also the way to persist bulk training)."""
+        self.pending = 0
+        if self.saver is not None:
+            self.saver.request(brain) # The saver truncates the journal once the snapshot is written
+            return
+        with self.lock:
+            save_brain(brain, self.filename)
+            truncate_journal(self.filename, getattr(brain, 'journal_seq', 0), getattr(brain, 'brain_id', None))
+
+    def _append(self, brain, kind, replace=False, **fields):
+        """Append one event record (replace=True: atomically make it the whole journal)."""
+        seq = max(getattr(brain, 'journal_seq', 0), self.last_seq) + 1
+        event = dict(fields, event=kind, seq=seq, brain=_journal_lineage(brain))
+        payload = pickle.dumps(event, protocol=pickle.HIGHEST_PROTOCOL)
+        record = _RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+        with _journal_lock:
+            if replace:
+                _replace_file(self.path, lambda f: f.write(record))
+                self.pending = 0
+            else:
+                with open(self.path, 'ab') as f:
+                    f.write(record)
+                    f.flush()
+                    if self.fsync:
+                        os.fsync(f.fileno())
+        brain.journal_seq = self.last_seq = seq
+        self.pending += 1
+        if self.compact_every and self.pending >= self.compact_every:
+            self.compact(brain)
+
+class BackgroundSaver:
+    """
+    v11.0: Debounced background saving of one brain file.
+    request(brain) only bumps a version counter and returns. A writer thread waits until
+    requests have been quiet for `delay` seconds (at most `max_delay` after the first unsaved
+    one), snapshots the latest brain while holding `lock` (hold it too while mutating the
+    brain), then writes outside the lock, so a burst of updates costs a single write.
+    The journal is truncated up to the written snapshot.
+    flush() waits until every request is on disk; close() (also run at exit) flushes and stops.
+    """
+    def __init__(self, filename=DEFAULT_SAVE_FILE, delay=1.0, max_delay=10.0):
+        self.filename = filename
+        self.delay = delay
+        self.max_delay = max_delay
+        self.lock = threading.RLock()
+        self.requested = 0
+        self.written = 0
+        self.last_error = None
+        self._brain = None
+        self._first_request = self._last_request = 0.0
+        self._urgent = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name=f"BackgroundSaver({filename})", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def request(self, brain):
+        """Schedule a save of `brain`; returns the version that flush() will wait for."""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("BackgroundSaver is closed")
+            self._brain = brain
+            self._last_request = time.monotonic()
+            if self.written == self.requested:
+                self._first_request = self._last_request
+            self.requested += 1
+            self._cond.notify_all()
+            return self.requested
+
+    def flush(self, timeout=None):
+        """Write pending requests now (skipping the delay). False if the timeout expired."""
+        with self._cond:
+            if self.written < self.requested:
+                self._urgent = True
+                self._cond.notify_all()
+            return self._cond.wait_for(lambda: self.written >= self.requested, timeout)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all() # Wake the writer even when nothing is pending
+        self.flush()
+        self._thread.join()
+        atexit.unregister(self.close)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self.written < self.requested or self._closed)
+                if self.written >= self.requested:
+                    return # Closed and nothing left to write
+                # Debounce: let a burst of requests settle (unless flushing).
+                while not (self._urgent or self._closed):
+                    remaining = min(self._last_request + self.delay,
+                                    self._first_request + self.max_delay) - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                brain, version = self._brain, self.requested
+                self._urgent = False
+
+            error = None
+            try:
+                with self.lock:
+                    snapshot = snapshot_brain(brain, self.filename)
+                    seq = getattr(brain, 'journal_seq', 0)
+                    lineage = getattr(brain, 'brain_id', None)
+                write_snapshot(snapshot, self.filename)
+                truncate_journal(self.filename, seq, lineage)
+            except Exception as e:
+                error = e
+                print(f"Warning: Background save of {self.filename} failed: {e}")
+
+            with self._cond:
+                self.written = version
+                self.last_error = error
+                self._cond.notify_all()
 
 # --- 3. 核心：星图可视化引擎 ---
 def get_star_map_figure(brain):
-    # v10.1: 3D Visualization using Plotly
-    stars = brain.get_all_stars()
-    
-    if len(stars) < 3:
-        return None, "星系太小，暂不展示星图 (需要至少3颗恒星)"
+    """
+    3D star map (plotly figure, message).
+    v11.0: Lives in star_map.py; its heavy dependencies (scikit-learn, plotly) are imported on
+    first use so that headless training/serving only pays for NumPy.
+    """
+    from star_map import get_star_map_figure as draw
+    return draw(brain)
 
-    # 提取向量和标签
-    vectors = np.array([s.vector for s in stars])
-    labels = np.array([s.label for s in stars])
-    
-    if not np.all(np.isfinite(vectors)):
-        return None, "数据包含无效值 (NaN/Inf)，无法绘制星图。"
-
-    # t-SNE 降维 (3 Components for 3D)
-    # Perplexity 必须小于 n_samples
-    n_samples = len(vectors)
-    perp = min(30, n_samples - 1)
-    if perp < 1: perp = 1
-    
-    tsne = TSNE(n_components=3, perplexity=perp, random_state=42, init='pca', learning_rate='auto')
-    try:
-        vectors_3d = tsne.fit_transform(vectors)
-    except Exception as e:
-        return None, f"TSNE 降维失败: {e}"
+if __name__ == "__main__":
+    # Self-checks of the persistence machinery (python cosmos_net.py)
+    import tempfile
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "check.pkl")
 
-    # Double Check sizes
-    num_points = min(len(stars), len(vectors_3d))
-    
-    # 准备 3D 数据
-    x_vals = vectors_3d[:num_points, 0]
-    y_vals = vectors_3d[:num_points, 1]
-    z_vals = vectors_3d[:num_points, 2]
-    
-    # 颜色映射 (0-9)
-    colors = []
-    # Use Plotly numerical colors
-    for lab in labels[:num_points]:
-        try:
-            val = int(lab) % 10
-            colors.append(val)
-        except:
-            colors.append(0)
-
-    # 创建 3D 散点图
-    fig = go.Figure(data=[go.Scatter3d(
-        x=x_vals,
-        y=y_vals,
-        z=z_vals,
-        mode='markers', # Remove 'text' mode to avoid clutter, show on hover
-        marker=dict(
-            size=5,
-            color=colors,
-            colorscale='Rainbow',
-            opacity=0.8
-        ),
-        text=labels[:num_points], # Hover text
-        hoverinfo='text'
-    )])
-
-    # 计算连接 (引力 > 0.85) - 3D Lines
-    # Plotly draws lines by adding None between segments
-    edge_x = []
-    edge_y = []
-    edge_z = []
-    
-    # Optimization: If too many stars, don't draw lines (Clutter reduction)
-    draw_lines = (num_points <= 300)
-    
-    if draw_lines:
-        for i in range(num_points):
-            for j in range(i + 1, num_points):
-                gravity = np.dot(stars[i].vector, stars[j].vector)
-                if gravity > 0.85:
-                    # Add line segment
-                    edge_x.extend([x_vals[i], x_vals[j], None])
-                    edge_y.extend([y_vals[i], y_vals[j], None])
-                    edge_z.extend([z_vals[i], z_vals[j], None])
-
-    if edge_x:
-        fig.add_trace(go.Scatter3d(
-            x=edge_x,
-            y=edge_y,
-            z=edge_z,
-            mode='lines',
-            line=dict(color='gray', width=1, dash='solid'),
-            opacity=0.1,
-            hoverinfo='none'
-        ))
-
-    # 布局设置
-    fig.update_layout(
-        title=f"Cosmos Neural Topology (3D) - {len(stars)} Stars",
-        scene=dict(
-            xaxis=dict(visible=False),
-            yaxis=dict(visible=False),
-            zaxis=dict(visible=False),
-            bgcolor='rgba(0,0,0,0)' # Transparent background
-        ),
-        margin=dict(l=0, r=0, b=0, t=30),
-        paper_bgcolor='rgba(0,0,0,0)',
-        showlegend=False
-    )
-    
-    return fig, "Success"
+        # An idle saver must close (this also runs at interpreter exit).
+        saver = BackgroundSaver(path)
+        closer = threading.Thread(target=saver.close, daemon=True)
+        closer.start()
+        closer.join(5)
+        assert not closer.is_alive(), "BackgroundSaver.close() hung with nothing pending"
+
+        # A new session's brain bound to the same file never replays the previous session's journal.
+        rng = np.random.default_rng(0)
+        for label in ('a', 'b'):
+            brain, journal = CorpusCallosum(), BrainJournal(path, fsync=False)
+            for _ in range(5 if label == 'a' else 3):
+                journal.memorize(brain, rng.normal(size=8), label)
+        journal.compact(brain)
+        labels = [star.label for star in load_or_create_brain(path)[0].get_all_stars()]
+        assert labels == ['b'] * 3, f"Journal of another session replayed: {labels}"
+    print("✅ Persistence self-checks passed.")
@@ -0,0 +1,61 @@
+"""
+Raw MNIST (IDX) reader: memory-maps data/MNIST/raw with NumPy, no torchvision.
+
+IDX layout: 2 zero bytes, a dtype code, the number of dimensions, one big-endian uint32 per
+dimension, then the row-major data. Only the uint8 files MNIST ships are supported.
+A file that only exists gzipped (as downloaded) is decompressed next to it once.
+"""
+import gzip
+import os
+import shutil
+import struct
+import numpy as np
+
+MNIST_RAW = os.path.join("data", "MNIST", "raw")
+IDX_UBYTE = 0x08
+
+def idx_path(train=True, kind='images', root=MNIST_RAW):
+    split = "train" if train else "t10k"
+    ndim = 3 if kind == 'images' else 1
+    return os.path.join(root, f"{split}-{kind}-idx{ndim}-ubyte")
+
+def open_idx(path):
+    """Read-only np.memmap over an IDX file (uint8, shape from its header)."""
+    if not os.path.exists(path):
+        if not os.path.exists(path + ".gz"):
+            raise FileNotFoundError(f"{path} (or .gz) not found; download MNIST into {os.path.dirname(path)} first")
+        tmp = path + ".tmp"
+        with gzip.open(path + ".gz", 'rb') as src, open(tmp, 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+        os.replace(tmp, path)
+
+    with open(path, 'rb') as f:
+        zero, dtype, ndim = struct.unpack(">HBB", f.read(4))
+        if zero != 0 or dtype != IDX_UBYTE:
+            raise ValueError(f"{path} is not a uint8 IDX file")
+        shape = struct.unpack(f">{ndim}I", f.read(4 * ndim))
+    return np.memmap(path, dtype=np.uint8, mode='r', offset=4 + 4 * ndim, shape=shape)
+
+def load_mnist_idx(train=True, root=MNIST_RAW):
+    """(images N x 28 x 28, labels N) as uint8 memmaps; nothing is read until it is used."""
+    images = open_idx(idx_path(train, 'images', root))
+    labels = open_idx(idx_path(train, 'labels', root))
+    if len(images) != len(labels):
+        raise ValueError(f"MNIST {'train' if train else 't10k'}: {len(images)} images but {len(labels)} labels")
+    return images, labels
+
+def iter_mnist(batch_size=256, limit=None, train=True, root=MNIST_RAW):
+    """
+    Generator of (images, labels) batches straight from the mapped files:
+    images is a uint8 (B x 28 x 28) view, labels an int64 array of digits.
+    """
+    images, labels = load_mnist_idx(train, root)
+    total = len(images) if limit is None else min(limit, len(images))
+    for lo in range(0, total, batch_size):
+        hi = min(lo + batch_size, total)
+        yield images[lo:hi], labels[lo:hi].astype(np.int64)
+
+def mnist_size(limit=None, train=True, root=MNIST_RAW):
+    """Number of samples iter_mnist(limit=limit) will yield (reads only the label header)."""
+    total = len(open_idx(idx_path(train, 'labels', root)))
+    return total if limit is None else min(limit, total)
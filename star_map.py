@@ -0,0 +1,116 @@
+"""
+Cosmos-Net 星图可视化 (Star map visualization layer).
+
+v11.0: Split out of cosmos_net so the memory engine imports with NumPy only; scikit-learn
+(t-SNE) and plotly are loaded when a star map is first drawn. Use it through
+cosmos_net.get_star_map_figure or import it directly.
+"""
+import numpy as np
+from sklearn.manifold import TSNE
+import plotly.graph_objects as go
+
+def get_star_map_figure(brain):
+    # v10.1: 3D Visualization using Plotly
+    stars = brain.get_all_stars()
+    
+    if len(stars) < 3:
+        return None, "星系太小，暂不展示星图 (需要至少3颗恒星)"
+
+    # 提取向量和标签
+    vectors = np.array([s.vector for s in stars])
+    labels = np.array([s.label for s in stars])
+    
+    if not np.all(np.isfinite(vectors)):
+        return None, "数据包含无效值 (NaN/Inf)，无法绘制星图。"
+
+    # t-SNE 降维 (3 Components for 3D)
+    # Perplexity 必须小于 n_samples
+    n_samples = len(vectors)
+    perp = min(30, n_samples - 1)
+    if perp < 1: perp = 1
+    
+    tsne = TSNE(n_components=3, perplexity=perp, random_state=42, init='pca', learning_rate='auto')
+    try:
+        vectors_3d = tsne.fit_transform(vectors)
+    except Exception as e:
+        return None, f"TSNE 降维失败: {e}"
+
+    # Double Check sizes
+    num_points = min(len(stars), len(vectors_3d))
+    
+    # 准备 3D 数据
+    x_vals = vectors_3d[:num_points, 0]
+    y_vals = vectors_3d[:num_points, 1]
+    z_vals = vectors_3d[:num_points, 2]
+    
+    # 颜色映射 (0-9)
+    colors = []
+    # Use Plotly numerical colors
+    for lab in labels[:num_points]:
+        try:
+            val = int(lab) % 10
+            colors.append(val)
+        except:
+            colors.append(0)
+
+    # 创建 3D 散点图
+    fig = go.Figure(data=[go.Scatter3d(
+        x=x_vals,
+        y=y_vals,
+        z=z_vals,
+        mode='markers', # Remove 'text' mode to avoid clutter, show on hover
+        marker=dict(
+            size=5,
+            color=colors,
+            colorscale='Rainbow',
+            opacity=0.8
+        ),
+        text=labels[:num_points], # Hover text
+        hoverinfo='text'
+    )])
+
+    # 计算连接 (引力 > 0.85) - 3D Lines
+    # Plotly draws lines by adding None between segments
+    edge_x = []
+    edge_y = []
+    edge_z = []
+    
+    # Optimization: If too many stars, don't draw lines (Clutter reduction)
+    draw_lines = (num_points <= 300)
+    
+    if draw_lines:
+        for i in range(num_points):
+            for j in range(i + 1, num_points):
+                gravity = np.dot(stars[i].vector, stars[j].vector)
+                if gravity > 0.85:
+                    # Add line segment
+                    edge_x.extend([x_vals[i], x_vals[j], None])
+                    edge_y.extend([y_vals[i], y_vals[j], None])
+                    edge_z.extend([z_vals[i], z_vals[j], None])
+
+    if edge_x:
+        fig.add_trace(go.Scatter3d(
+            x=edge_x,
+            y=edge_y,
+            z=edge_z,
+            mode='lines',
+            line=dict(color='gray', width=1, dash='solid'),
+            opacity=0.1,
+            hoverinfo='none'
+        ))
+
+    # 布局设置
+    fig.update_layout(
+        title=f"Cosmos Neural Topology (3D) - {len(stars)} Stars",
+        scene=dict(
+            xaxis=dict(visible=False),
+            yaxis=dict(visible=False),
+            zaxis=dict(visible=False),
+            bgcolor='rgba(0,0,0,0)' # Transparent background
+        ),
+        margin=dict(l=0, r=0, b=0, t=30),
+        paper_bgcolor='rgba(0,0,0,0)',
+        showlegend=False
+    )
+    
+    return fig, "Success"
@@ -1,15 +1,19 @@
-import torch
-import torchvision
-import torchvision.transforms as transforms
-from PIL import Image
 import numpy as np
+import threading
 import time
+from statistics import NormalDist
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from queue import Queue, Full
 
 def load_mnist(limit=1000, train=True):
     """
     Downloads and provides a subset of MNIST data.
     train=True for training set, False for test set.
+    (For large runs, mnist_idx.iter_mnist streams the raw files without torchvision.)
     """
+    import torchvision
+    import torchvision.transforms as transforms
     mode_str = "Training" if train else "Test"
     print(f"📚 Opening the Library (MNIST {mode_str} Set)...")
     transform = transforms.Compose([
@@ -40,66 +44,308 @@ def load_mnist(limit=1000, train=True):
         
     return dataset
 
-def evolve_in_dreams(brain, retina, dataset, progress_callback=None):
+def see(retina, images):
+    """
+    Retina vectors (N x D float32) for a list of images, batched when the Retina can.
+    Without a Retina (pixel mode) a uint8 image batch is flattened into L2-normalized pixel
+    vectors, the scale the app's pixel path perceives with (the Left Brain's features depend on it).
+    """
+    if retina is None:
+        images = np.asarray(images)
+        pixels = images.reshape(len(images), -1).astype(np.float32)
+        norms = np.linalg.norm(pixels, axis=1, keepdims=True)
+        return pixels / np.where(norms > 0, norms, 1) # Blank images stay zero
+    if hasattr(retina, 'perceive_batch'):
+        return retina.perceive_batch(images)
+    return np.array([retina.perceive(image) for image in images], dtype=np.float32)
+
+def bind_retina(brain, retina):
+    """
+    A brain only understands the Retina it learned from (backend, resolution, ...):
+    record the Retina version on first use and refuse a different one afterwards.
+    """
+    version = getattr(retina, 'version', None)
+    if version is None:
+        return
+    known = getattr(brain, 'retina_version', None)
+    if known is None:
+        brain.retina_version = version
+    elif known != version:
+        raise ValueError(f"Brain was trained with Retina {known}, not {version}")
+
+def _chunks(dataset, chunk_size):
+    """(images, labels) batches of a list of (image, label) pairs."""
+    for lo in range(0, len(dataset), chunk_size):
+        chunk = dataset[lo:lo + chunk_size]
+        yield [image for image, _ in chunk], [label for _, label in chunk]
+
+def _perceive_chunk(retina, images, batch_labels):
+    """(features, labels) of one batch; a bad image spoils the batch, so look again one by one."""
+    labels = [str(label) for label in batch_labels] # Labels are strings, as in load_mnist
+    try:
+        return see(retina, images), labels
+    except Exception:
+        features, kept = [], []
+        for image, label in zip(images, labels):
+            try:
+                features.append(see(retina, [image])[0])
+                kept.append(label)
+            except Exception as e:
+                print(f"❌ Nightmare (Error): {e}")
+        return features, kept
+
+def _memorize_chunk(brain, features, labels):
+    """
+    Number of new stars from memorizing one batch. A malformed sample fails memorize_batch
+    before it memorizes anything, so memorize one by one and skip only that sample.
+    """
+    try:
+        actions = brain.memorize_batch(np.asarray(features), labels)
+    except Exception:
+        actions = []
+        for x, label in zip(features, labels):
+            try:
+                actions.append(brain.memorize(x, label))
+            except Exception as e:
+                print(f"❌ Nightmare (Error): {e}")
+    return sum("New" in action for action in actions)
+
+class _StageCounter:
+    """Throughput of one pipeline stage: batches, samples, busy seconds and seconds blocked on the queue."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.batches = self.samples = 0
+        self.busy = self.blocked = 0.0
+
+    def add(self, samples, busy=0.0, blocked=0.0):
+        with self.lock:
+            self.batches += 1 if busy else 0
+            self.samples += samples
+            self.busy += busy
+            self.blocked += blocked
+
+    def report(self):
+        return {'batches': self.batches, 'samples': self.samples, 'busy_seconds': self.busy,
+                'blocked_seconds': self.blocked,
+                'samples_per_s': self.samples / self.busy if self.busy else 0.0}
+
+def _retina_stage(retina, batches, batches_lock, queue, stop, counter):
+    """Producer: perceive batches (shared iterator) and hand (index, result) to the memorize stage."""
+    def put(item):
+        start = time.perf_counter()
+        while not stop.is_set(): # Backpressure: wait while the queue is full
+            try:
+                queue.put(item, timeout=0.1)
+                break
+            except Full:
+                continue
+        counter.add(0, blocked=time.perf_counter() - start)
+
+    try:
+        while not stop.is_set():
+            with batches_lock:
+                try:
+                    index, (images, labels) = next(batches)
+                except StopIteration:
+                    break
+            start = time.perf_counter()
+            result = _perceive_chunk(retina, images, labels)
+            counter.add(len(images), busy=time.perf_counter() - start)
+            put((index, (len(images),) + result))
+    except BaseException as e:
+        put((None, e))
+    put(None) # This producer is done
+
+def evolve_in_dreams(brain, retina, dataset, progress_callback=None, chunk_size=256, total=None,
+                     retina_workers=1, queue_size=4, stats=None):
     """
     Batch evolution loop (Deep Sleep Mode).
+    Memories are consolidated one chunk at a time with brain.memorize_batch,
+    which gives the same brain as memorizing sample by sample.
+
+    dataset: a list of (image, label) pairs, or an iterable of (images, labels) batches
+    such as mnist_idx.iter_mnist() (pass `total` for progress). retina=None trains the
+    pixel-mode brain on the raw uint8 pixels.
+
+    v11.0: Pipelined. `retina_workers` threads perceive chunks into a queue of at most
+    `queue_size` chunks (backpressure) while this thread, the only writer, memorizes them
+    in dataset order, so the brain is the same as the sequential loop's. Per-stage
+    throughput counters are written into the `stats` dict if given.
+    More than one Retina worker calls the same retina concurrently, so it must declare
+    `thread_safe = True` (retina.Retina does; pixel mode needs no Retina).
     """
+    if retina_workers > 1 and retina is not None and not getattr(retina, 'thread_safe', False):
+        raise ValueError(f"retina_workers={retina_workers} needs a Retina that declares thread_safe = True")
     count = 0
-    total = len(dataset)
+    if isinstance(dataset, (list, tuple)):
+        total = len(dataset)
+        batches = _chunks(dataset, chunk_size)
+    else:
+        batches = iter(dataset)
     new_stars = 0
     
-    print(f"💤 Entering Deep Sleep. Processing {total} memories...")
+    bind_retina(brain, retina)
+    print(f"💤 Entering Deep Sleep. Processing {total if total is not None else 'streamed'} memories...")
     
     start_time = time.time()
-    
-    for image, label in dataset:
-        try:
-            # 1. Perceive via Retina
-            # Note: We must ensure image is in correct format for Retina
-            features = retina.perceive(image)
-            
-            # 2. Memorize
-            # Unlike interactive mode, we trust the dataset labels here (Supervised Batch)
-            # OR we could just "perceive" and only reinforce if confident?
-            # For "Mass Evolution", we typically treat it as Ground Truth teaching.
-            action = brain.memorize(features, label)
-            
-            if "New" in action:
-                new_stars += 1
+
+    queue = Queue(maxsize=queue_size)
+    stop = threading.Event()
+    perceived, memorized = _StageCounter(), _StageCounter()
+    indexed = enumerate(batches) # Shared by every producer, behind batches_lock
+    batches_lock = threading.Lock()
+    producers = [threading.Thread(target=_retina_stage, name=f"retina-stage-{i}", daemon=True,
+                                  args=(retina, indexed, batches_lock, queue, stop, perceived))
+                 for i in range(max(1, retina_workers))]
+    for producer in producers:
+        producer.start()
+
+    pending = {} # Chunks perceived out of order, by index
+    next_index = 0
+    running = len(producers)
+    try:
+        while running:
+            wait_start = time.perf_counter()
+            item = queue.get()
+            memorized.add(0, blocked=time.perf_counter() - wait_start)
+            if item is None:
+                running -= 1
+                continue
+            index, result = item
+            if index is None:
+                raise result
+            pending[index] = result
+            while next_index in pending:
+                n_images, features, labels = pending.pop(next_index)
+                next_index += 1
+                count += n_images
+                if progress_callback:
+                    progress_callback(count, total)
                 
-        except Exception as e:
-            print(f"❌ Nightmare (Error): {e}")
-        
-        count += 1
-        if progress_callback:
-            progress_callback(count, total)
+                if not len(features):
+                    continue
+                
+                busy_start = time.perf_counter()
+                # 2. Memorize
+                # Unlike interactive mode, we trust the dataset labels here (Supervised Batch)
+                # OR we could just "perceive" and only reinforce if confident?
+                # For "Mass Evolution", we typically treat it as Ground Truth teaching.
+                new_stars += _memorize_chunk(brain, features, labels)
+                memorized.add(len(labels), busy=time.perf_counter() - busy_start)
+    finally:
+        stop.set() # Release producers blocked on a full queue
+        for producer in producers:
+            producer.join()
             
     duration = time.time() - start_time
-    return f"Evolution Complete. Dreamed of {total} concepts in {duration:.2f}s. {new_stars} new stars created."
+    if stats is not None:
+        stats.update(retina=perceived.report(), memorize=memorized.report(), seconds=duration,
+                     samples_per_s=count / duration if duration else 0.0)
+    return f"Evolution Complete. Dreamed of {count} concepts in {duration:.2f}s. {new_stars} new stars created."
+
+# --- Read-only exam workers: one shared brain snapshot + shared exam features per process ---
+_exam = {}
 
-def evaluate_brain(brain, retina, dataset, progress_callback=None, self_reinforce=False):
+def _attach_exam(brain_name, features_name, shape):
+    brain_shm, features_shm = SharedMemory(name=brain_name), SharedMemory(name=features_name)
+    from cosmos_net import attach_brain
+    _exam.update(shm=(brain_shm, features_shm), brain=attach_brain(brain_shm.buf),
+                 features=np.ndarray(shape, dtype=np.float32, buffer=features_shm.buf))
+
+def _score_range(brain, X, lo, hi, batch_size):
+    """(lo, predicted labels, per-image latency in seconds) of rows lo:hi, in batches."""
+    labels, latencies = [], []
+    for a in range(lo, hi, batch_size):
+        start = time.perf_counter()
+        pred_labels, _, _ = brain.perceive_batch(X[a:min(a + batch_size, hi)])
+        elapsed = time.perf_counter() - start
+        labels.extend(pred_labels) # Every image of a batch waits for the whole batch
+        latencies.extend([elapsed] * len(pred_labels))
+    return lo, labels, latencies
+
+def _exam_range(lo, hi, batch_size):
+    return _score_range(_exam['brain'], _exam['features'], lo, hi, batch_size)
+
+def _score_parallel(brain, X, workers, batch_size):
+    """Score X in `workers` processes sharing one snapshot of the brain and of X."""
+    from cosmos_net import share_brain
+    brain_shm = share_brain(brain)
+    features_shm = SharedMemory(create=True, size=max(1, X.nbytes))
+    try:
+        np.ndarray(X.shape, dtype=np.float32, buffer=features_shm.buf)[...] = X
+        step = max(batch_size, -(-len(X) // (4 * workers))) # A few ranges per worker for balance
+        with ProcessPoolExecutor(workers, initializer=_attach_exam,
+                                 initargs=(brain_shm.name, features_shm.name, X.shape)) as pool:
+            futures = [pool.submit(_exam_range, lo, min(lo + step, len(X)), batch_size)
+                       for lo in range(0, len(X), step)]
+            parts = [future.result() for future in futures] # In dataset order
+    finally:
+        for shm in (brain_shm, features_shm):
+            shm.close()
+            shm.unlink()
+    return ([label for _, labels, _ in parts for label in labels],
+            [latency for _, _, latencies in parts for latency in latencies])
+
+def evaluate_brain(brain, retina, dataset, progress_callback=None, self_reinforce=False, chunk_size=256,
+                   workers=None, batch_size=256, report=None):
+    """
+    The exam. With self_reinforce=False the brain is read-only: everything is seen first,
+    then answered in batches of `batch_size`.
+    workers: answer in this many processes that share one snapshot of the brain (galaxy
+    columns, index, Left Brain statistics) and of the exam vectors through shared memory.
+    report: optional dict, filled (read-only exam) with the confusion counts
+    {true label: {predicted label: count}} and per-image latency percentiles in ms.
+    """
     correct = 0
     total = len(dataset)
     start_time = time.time()
     reinforced_count = 0
+    bind_retina(brain, retina)
 
-    for i, (image, true_label) in enumerate(dataset):
-        features = retina.perceive(image)
-        star, gravity = brain.perceive(features)
-        pred_label = star.label if star else "?"
-        
-        is_correct = str(pred_label) == str(true_label)
-        
-        if is_correct:
-            correct += 1
-            # Self-Reinforcement: If I am right, I become more confident.
-            # This is "Test-Time Training" or "Confirmation Bias" in action.
-            if self_reinforce:
+    if self_reinforce:
+        for i, (image, true_label) in enumerate(dataset):
+            features = see(retina, [image])[0]
+            star, gravity = brain.perceive(features)
+            pred_label = star.label if star else "?"
+            
+            is_correct = str(pred_label) == str(true_label)
+            
+            if is_correct:
+                correct += 1
+                # Self-Reinforcement: If I am right, I become more confident.
+                # This is "Test-Time Training" or "Confirmation Bias" in action.
                 brain.memorize(features, true_label)
                 reinforced_count += 1
-        
-        if progress_callback:
-            progress_callback(i + 1, total)
+            
+            if progress_callback:
+                progress_callback(i + 1, total)
+    else:
+        # Read-only exam: see everything first, then answer with one batched scan of the galaxy.
+        features = []
+        for lo in range(0, total, chunk_size):
+            features.append(see(retina, [image for image, _ in dataset[lo:lo + chunk_size]]))
+            if progress_callback:
+                progress_callback(min(lo + chunk_size, total), total)
+        if features:
+            X = np.concatenate(features).astype(np.float32, copy=False)
+            scoring_start = time.time()
+            if workers and workers > 1:
+                pred_labels, latencies = _score_parallel(brain, X, workers, batch_size)
+            else:
+                _, pred_labels, latencies = _score_range(brain, X, 0, len(X), batch_size)
+            confusion = {}
+            for pred_label, (image, true_label) in zip(pred_labels, dataset):
+                pred_label = str(pred_label if pred_label is not None else "?")
+                if pred_label == str(true_label):
+                    correct += 1
+                row = confusion.setdefault(str(true_label), {})
+                row[pred_label] = row.get(pred_label, 0) + 1
+            if report is not None:
+                p50, p90, p99 = np.percentile(np.array(latencies) * 1000, [50, 90, 99])
+                report.update(confusion=confusion, workers=workers or 1,
+                              scoring_seconds=time.time() - scoring_start,
+                              latency_ms={'p50': float(p50), 'p90': float(p90), 'p99': float(p99),
+                                          'max': max(latencies) * 1000})
             
     duration = time.time() - start_time
     accuracy = (correct / total) * 100 if total > 0 else 0
@@ -109,3 +355,73 @@ def evaluate_brain(brain, retina, dataset, progress_callback=None, self_reinforc
         msg += f". Reinforced {reinforced_count} correct memories."
         
     return accuracy, msg
+
+def _stratified_order(labels, rng):
+    """
+    Sample order in which every prefix is a proportionally stratified random sample:
+    each label's samples are shuffled and spread evenly over the sequence.
+    """
+    keys = np.empty(len(labels))
+    for label in set(labels):
+        rows = np.flatnonzero(np.asarray(labels, dtype=object) == label)
+        rng.shuffle(rows)
+        keys[rows] = (np.arange(len(rows)) + rng.random(len(rows))) / len(rows)
+    return np.argsort(keys, kind='stable')
+
+def sample_exam(brain, retina, dataset, ci_width=0.02, confidence=0.95, batch_size=64, min_samples=100,
+                seed=0, progress_callback=None, report=None):
+    """
+    Monitoring exam: a stratified random sample per label, scored (read-only) one batch at a
+    time until the `confidence` interval of the accuracy is at most `ci_width` wide (as a
+    fraction, 0.02 = +-1 point) or the dataset is exhausted.
+
+    Accuracy is the stratified estimate sum_h W_h * p_h (W_h = the label's share of the
+    dataset) with a finite-population-corrected normal interval; per-label rates are
+    smoothed ((correct + 0.5) / (n + 1)) in the variance so a perfect label does not end
+    the exam early. Returns (accuracy %, message) like evaluate_brain; `report` receives
+    the interval, the sample sizes and the per-label counts.
+    """
+    start_time = time.time()
+    bind_retina(brain, retina)
+    true_labels = [str(label) for _, label in dataset]
+    total = len(dataset)
+    order = _stratified_order(true_labels, np.random.default_rng(seed))
+    population = {}
+    for label in true_labels:
+        population[label] = population.get(label, 0) + 1
+    counts = {label: [0, 0] for label in population} # label: [seen, correct]
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+
+    estimate, low, high, seen = 0.0, 0.0, 1.0, 0
+    for lo in range(0, total, batch_size):
+        rows = order[lo:lo + batch_size]
+        pred_labels, _, _ = brain.perceive_batch(see(retina, [dataset[i][0] for i in rows]))
+        for i, pred_label in zip(rows, pred_labels):
+            stratum = counts[true_labels[i]]
+            stratum[0] += 1
+            stratum[1] += str(pred_label if pred_label is not None else "?") == true_labels[i]
+        seen += len(rows)
+        if progress_callback:
+            progress_callback(seen, total)
+
+        estimate, variance = 0.0, 0.0
+        for label, (n, correct) in counts.items():
+            if not n:
+                continue
+            weight = population[label] / total
+            smoothed = (correct + 0.5) / (n + 1)
+            estimate += weight * correct / n
+            variance += weight ** 2 * smoothed * (1 - smoothed) / n * (1 - n / population[label])
+        margin = z * np.sqrt(variance)
+        low, high = max(0.0, estimate - margin), min(1.0, estimate + margin)
+        if seen >= min(min_samples, total) and high - low <= ci_width:
+            break
+
+    if report is not None:
+        report.update(accuracy=estimate, ci=(low, high), ci_width=high - low, confidence=confidence,
+                      samples=seen, population=total, stopped_early=seen < total,
+                      per_label={label: {'samples': n, 'correct': correct} for label, (n, correct) in counts.items()})
+    duration = time.time() - start_time
+    msg = (f"Sampled Exam: {estimate * 100:.2f}% ({confidence * 100:.0f}% CI {low * 100:.2f}-{high * 100:.2f}%) "
+           f"from {seen}/{total} samples. Time: {duration:.2f}s")
+    return estimate * 100, msg